@@ -1,13 +1,43 @@
 from .staff_schemas import (
+    ScheduleShift,
     StaffRequest,
     StaffResponse,
     StaffListResponse,
+    StaffBatchRequest,
+    StaffBatchResponse,
+    StaffSearchResult,
+    StaffSearchResponse,
+    StaffChangesResponse,
+    StaffImportError,
+    StaffImportResponse,
+    CoverageDay,
+    CoverageGap,
+    CoverageResponse,
+    ScheduleConflict,
+    ScheduleConflictsResponse,
+    DatedShiftResponse,
+    DatedShiftsResponse,
     MessageResponse
 )
 
 __all__ = [
+    'ScheduleShift',
     'StaffRequest',
     'StaffResponse',
     'StaffListResponse',
+    'StaffBatchRequest',
+    'StaffBatchResponse',
+    'StaffSearchResult',
+    'StaffSearchResponse',
+    'StaffChangesResponse',
+    'StaffImportError',
+    'StaffImportResponse',
+    'CoverageDay',
+    'CoverageGap',
+    'CoverageResponse',
+    'ScheduleConflict',
+    'ScheduleConflictsResponse',
+    'DatedShiftResponse',
+    'DatedShiftsResponse',
     'MessageResponse'
 ]
@@ -1,13 +1,40 @@
-from pydantic import BaseModel
+import json
+from pydantic import BaseModel, Field, field_validator
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional, Union
+from helpers.schedule import ScheduleError, validate_schedule
+
+
+class ScheduleShift(BaseModel):
+    """One shift of a weekly schedule. Ends at or before its start mean overnight."""
+    start: str = Field(pattern=r"^\d{2}:\d{2}$")
+    end: str = Field(pattern=r"^\d{2}:\d{2}$")
+    role: Optional[str] = None
 
 
 class StaffRequest(BaseModel):
     """Request model for creating/updating staff."""
     name: str
     email: Optional[str] = None
-    schedule: Optional[str] = "{}"
+    # A JSON string (stored as sent) or an object keyed by weekday
+    schedule: Optional[Union[str, Dict[str, List[ScheduleShift]]]] = "{}"
+
+    @field_validator("schedule")
+    @classmethod
+    def check_schedule(cls, value):
+        """Reject malformed or overlapping shifts; always hand a JSON string to the handlers."""
+        if value is None:
+            return value
+        if not isinstance(value, str):
+            value = json.dumps({
+                day: [shift.model_dump(exclude_none=True) for shift in shifts]
+                for day, shifts in value.items()
+            })
+        try:
+            validate_schedule(value)
+        except ScheduleError as e:
+            raise ValueError(str(e))
+        return value
 
 
 class StaffResponse(BaseModel):
@@ -27,6 +54,106 @@ class StaffResponse(BaseModel):
 class StaffListResponse(BaseModel):
     """Response model for list of staff."""
     staff: List[StaffResponse]
+    next_cursor: Optional[str] = None
+
+
+class StaffBatchRequest(BaseModel):
+    """Staff ids to resolve in one query."""
+    ids: List[str]
+
+
+class StaffBatchResponse(BaseModel):
+    """Staff found for a batch of ids, in request order, and the ids that don't exist."""
+    staff: List[StaffResponse]
+    missing: List[str]
+
+
+class StaffSearchResult(BaseModel):
+    """A typeahead match. score: 1.0 name prefix, 0.9 word prefix, below 0.8 fuzzy."""
+    id: str
+    name: str
+    email: Optional[str]
+    is_active: bool
+    score: float
+
+
+class StaffSearchResponse(BaseModel):
+    """Typeahead matches, best first."""
+    staff: List[StaffSearchResult]
+
+
+class StaffChangesResponse(BaseModel):
+    """Staff rows changed after a watermark, oldest first."""
+    staff: List[StaffResponse]
+    watermark: Optional[str] = None
+    has_more: bool = False
+
+
+class StaffImportError(BaseModel):
+    """A rejected import row."""
+    line: int
+    error: str
+
+
+class StaffImportResponse(BaseModel):
+    """Result of a bulk staff import."""
+    created: int
+    errors: List[StaffImportError]
+
+
+class CoverageDay(BaseModel):
+    """Headcount per slot for one weekday."""
+    weekday: str
+    headcount: List[int]
+    min_headcount: int
+    max_headcount: int
+
+
+class CoverageGap(BaseModel):
+    """A run of slots staffed below the required headcount."""
+    start_weekday: str
+    start: str
+    end_weekday: str
+    end: str
+    headcount: int
+
+
+class CoverageResponse(BaseModel):
+    """Weekly staffing coverage and under-staffed windows."""
+    slot_minutes: int
+    required_staff: int
+    days: List[CoverageDay]
+    gaps: List[CoverageGap]
+
+
+class ScheduleConflict(BaseModel):
+    """Overlapping shifts of one person, or a role held by too many people at once."""
+    kind: Literal["overlap", "role"]
+    role: Optional[str]
+    start_weekday: str
+    start: str
+    end_weekday: str
+    end: str
+    staff_ids: List[str]
+
+
+class ScheduleConflictsResponse(BaseModel):
+    """Schedule conflicts across all active staff."""
+    capacity: int
+    conflicts: List[ScheduleConflict]
+
+
+class DatedShiftResponse(BaseModel):
+    """A weekly shift materialized on a date. Times are UTC."""
+    staff_id: str
+    start: datetime
+    end: datetime
+    role: Optional[str]
+
+
+class DatedShiftsResponse(BaseModel):
+    """Dated shifts of the requested staff, ordered by staff (name, id) then start."""
+    shifts: List[DatedShiftResponse]
 
 
 class MessageResponse(BaseModel):
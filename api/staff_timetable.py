@@ -1,71 +1,279 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session, select
-from database import get_session
-from models.auth import Token
+import asyncio
+import io
+import tempfile
+import time
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, status
+from fastapi.responses import Response, StreamingResponse
+from sqlalchemy import String, func, tuple_, type_coerce, update
+from sqlmodel import select
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterator, List, Optional
+from database import DatabaseSession, get_read_session, get_session, open_session
 from models.staff_models import Staff
 from .schemas.staff_schemas import (
-    StaffRequest, StaffResponse, StaffListResponse, MessageResponse
+    StaffRequest, StaffResponse, StaffListResponse, StaffBatchRequest, StaffBatchResponse, StaffSearchResponse, StaffChangesResponse, StaffImportResponse,
+    CoverageResponse, ScheduleConflictsResponse, DatedShiftsResponse, MessageResponse
 )
-from helpers.auth import get_auth_token, require_user_or_agent
-from datetime import datetime, timezone
+from helpers.auth import AuthIdentity, get_auth_token, require_user_or_agent
+from helpers.conflicts import schedule_conflicts
+from helpers.coverage import coverage_cache, coverage_report
+from helpers.dated_shifts import dated_shift_cache
+from helpers.etag import make_etag, matches_if_match, matches_if_none_match, staff_etag
+from helpers.pagination import encode_cursor, decode_cursor
+from helpers.schedule import schedule_time_to_utc, windows_at, windows_between
+from helpers.shift_index import shift_index
+from helpers.single_flight import staff_reads
+from helpers.staff_events import change_event, naive_utc, staff_events, staff_watermark
+from helpers.staff_io import export_header, export_rows, import_staff_records
+from helpers.staff_json import (
+    STAFF_COLUMNS, STAFF_FIELDS, FastJSONResponse, dumps, encode_staff, encode_staff_array, parse_fields,
+    staff_columns, staff_dict, staff_json_lines
+)
+from helpers.staff_patch import (
+    JSON_PATCH_MEDIA_TYPE, MERGE_PATCH_MEDIA_TYPE, apply_patch, needs_current, parse_patch, staff_changes, staff_document
+)
+from helpers.staff_search import search_statement, staff_search_index
+from helpers.staff_snapshot import staff_snapshot
+from helpers.staff_shifts import on_shift_clause, replace_staff_shifts
+from settings import (
+    DB_BACKEND, SHIFT_LOOKUP_BACKEND, SHIFT_RANGE_MAX_DAYS, STAFF_PAGE_MAX_LIMIT, STAFF_STREAM_BATCH_SIZE,
+    STAFF_BATCH_MAX_IDS, STAFF_SEARCH_BACKEND, STAFF_SEARCH_MAX_LIMIT,
+    STAFF_IMPORT_BATCH_SIZE, STAFF_IMPORT_SPOOL_BYTES, STAFF_EVENTS_POLL_SECONDS
+)
+from datetime import datetime, timedelta, timezone
 
 router = APIRouter(prefix="/staff", tags=["staff_timetable"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# PATCH without If-Match re-applies the patch this many times when another write lands in between
+PATCH_ATTEMPTS = 3
+# Version compared by PUT's and PATCH's conditional UPDATE. SQLite keeps datetimes as text, possibly in
+# another format when the POS system wrote the row, so the stored text itself is compared.
+STAFF_VERSION = type_coerce(Staff.updated_at, String) if DB_BACKEND == "sqlite" else Staff.updated_at
+
 
 @router.get("/", response_model=StaffListResponse)
 async def list_staff(
     is_active: bool = None,
-    token: Token = Depends(get_auth_token),
-    db_session: Session = Depends(get_session)
+    limit: Optional[int] = Query(None, ge=1, le=STAFF_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    accept: Optional[str] = Header(None),
+    if_none_match: Optional[str] = Header(None),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
 ):
-    """List all staff members. Optionally filter by active status."""
+    """
+    List all staff members. Optionally filter by active status.
+
+    Pass `limit` to page through results ordered by (name, id); follow
+    `next_cursor` with `cursor` to get the next page. Without `limit` the
+    whole list is streamed from the database as it is read. Send
+    `Accept: application/x-ndjson` to stream one staff member per line
+    instead of building the whole list in memory. Pass `fields` (e.g.
+    `id,name,is_active`) to select and return only those columns.
+
+    JSON responses carry an ETag; send it back in `If-None-Match` to get
+    `304 Not Modified` when nothing in the filtered set has changed.
+    """
     await require_user_or_agent(token, db_session)
 
-    statement = select(Staff).order_by(Staff.name)
+    selected = parse_fields(fields)
+    # Keyset pagination: continue after the last (name, id) of the previous page
+    after = tuple(decode_cursor(cursor, 2)) if cursor is not None else None
+    ndjson = accept is not None and NDJSON_MEDIA_TYPE in accept
+
+    snapshot = staff_snapshot.serving
+    if snapshot:
+        if ndjson:
+            return Response(
+                staff_json_lines(staff_snapshot.page(is_active, after, limit), selected), media_type=NDJSON_MEDIA_TYPE
+            )
+        latest, row_count = staff_snapshot.probe(is_active)
+    else:
+        statement = _list_statement(selected, is_active, after)
+        if ndjson:
+            if limit is not None:
+                statement = statement.limit(limit)
+            return StreamingResponse(
+                _stream_staff_ndjson(statement, db_session.read_only, selected), media_type=NDJSON_MEDIA_TYPE
+            )
+
+        # Cheap probe decides 304 before any row is loaded or serialized
+        probe = _list_probe(is_active)
+        latest, row_count = await _shared_read(
+            db_session, ("list-probe", is_active), lambda session: _one(session, probe)
+        )
+
+    etag = make_etag("list", is_active, limit, cursor, selected, latest, row_count)
+    if matches_if_none_match(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    # Fetch one extra row to know whether there is a next page
+    fetch = limit + 1 if limit is not None else None
+    if snapshot:
+        staff_members = staff_snapshot.page(is_active, after, fetch)
+    elif fetch is None:
+        # No page size: stream the whole list from a server-side cursor instead of loading it
+        return StreamingResponse(
+            _stream_staff_json(statement, db_session.read_only, selected),
+            media_type="application/json", headers={"ETag": etag}
+        )
+    else:
+        statement = statement.limit(fetch)
+        staff_members = await _shared_read(
+            db_session, ("list", is_active, limit, cursor, selected), lambda session: _all(session, statement)
+        )
+
+    next_cursor = None
+    if limit is not None and len(staff_members) > limit:
+        staff_members = staff_members[:limit]
+        next_cursor = encode_cursor(staff_members[-1].name, staff_members[-1].id)
+
+    return FastJSONResponse(
+        b'{"staff":' + encode_staff_array(staff_members, selected) + b',"next_cursor":' + dumps(next_cursor) + b"}",
+        headers={"ETag": etag}
+    )
+
+
+def _list_statement(selected: tuple[str, ...], is_active: bool | None, after: tuple[str, str] | None):
+    # name and id are always read: the next page's cursor is built from them
+    statement = select(*staff_columns(selected, "name", "id")).order_by(Staff.name, Staff.id)
 
     # Apply active filter if provided
     if is_active is not None:
         statement = statement.where(Staff.is_active == is_active)
 
-    staff_members = db_session.exec(statement).all()
+    if after is not None:
+        statement = statement.where(tuple_(Staff.name, Staff.id) > tuple_(*after))
+    return statement
 
-    staff_responses = [
-        StaffResponse(
-            id=staff.id,
-            name=staff.name,
-            email=staff.email,
-            schedule=staff.schedule,
-            is_active=staff.is_active,
-            created_at=staff.created_at,
-            updated_at=staff.updated_at
-        )
-        for staff in staff_members
+
+def _list_probe(is_active: bool | None):
+    probe = select(func.max(Staff.updated_at), func.count(Staff.id))
+    if is_active is not None:
+        probe = probe.where(Staff.is_active == is_active)
+    return probe
+
+
+def _get_statement(selected: tuple[str, ...], staff_id: str):
+    # id and updated_at are always read for the ETag
+    return select(*staff_columns(selected, "id", "updated_at")).where(Staff.id == staff_id)
+
+
+def warmup_statements() -> list:
+    """The staff statements most requests run, for the startup warm-up to compile (and prepare, on Postgres)."""
+    # LIMIT is a bound parameter, so any value shares the compiled form of a page
+    return [
+        _list_probe(None),
+        _list_probe(True),
+        _list_statement(STAFF_FIELDS, None, None).limit(1),
+        _list_statement(STAFF_FIELDS, True, None).limit(1),
+        _list_statement(STAFF_FIELDS, True, ("", "")).limit(1),
+        _get_statement(STAFF_FIELDS, "")
     ]
 
-    return StaffListResponse(staff=staff_responses)
+
+async def warm_indexes(db_session: DatabaseSession) -> None:
+    """Build the in-memory indexes the routes use, so the first requests after startup don't."""
+    await shift_index.refresh(db_session)
+    if STAFF_SEARCH_BACKEND == "index":
+        await staff_search_index.refresh(db_session)
+    if staff_snapshot.enabled:
+        await staff_snapshot.refresh(db_session)
+
+
+async def _shared_read(db_session: DatabaseSession, key: tuple, query: Callable[[DatabaseSession], Awaitable]):
+    """
+    Run query once for all concurrent requests with the same key (see SingleFlight).
+
+    The shared query gets its own session, so it outlives any one request;
+    reads from the primary (read-your-writes) and the replica never mix.
+    """
+    if not staff_reads.enabled:
+        return await query(db_session)
+
+    async def run():
+        async with open_session(read_only=db_session.read_only) as session:
+            return await query(session)
+
+    return await staff_reads.do((*key, db_session.read_only), run)
+
+
+async def _one(db_session: DatabaseSession, statement):
+    return (await db_session.execute(statement)).one()
+
+
+async def _first(db_session: DatabaseSession, statement):
+    return (await db_session.execute(statement)).first()
+
+
+async def _all(db_session: DatabaseSession, statement) -> list:
+    return (await db_session.execute(statement)).all()
+
+
+async def _staff_batches(statement, read_only: bool) -> AsyncIterator[list]:
+    """Rows from a server-side cursor, STAFF_STREAM_BATCH_SIZE at a time."""
+    # The request session is closed once the handler returns, so streaming uses its own
+    async with open_session(read_only=read_only) as db_session:
+        batch = []
+        async for row in db_session.stream_rows(statement, STAFF_STREAM_BATCH_SIZE):
+            batch.append(row)
+            if len(batch) >= STAFF_STREAM_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+async def _stream_staff_ndjson(
+    statement,
+    read_only: bool,
+    fields: tuple[str, ...] = STAFF_FIELDS
+) -> AsyncIterator[bytes]:
+    """Yield NDJSON chunks straight from a server-side cursor."""
+    async for batch in _staff_batches(statement, read_only):
+        yield staff_json_lines(batch, fields)
+
+
+async def _stream_staff_json(
+    statement,
+    read_only: bool,
+    fields: tuple[str, ...] = STAFF_FIELDS
+) -> AsyncIterator[bytes]:
+    """Yield an unpaginated list response, the same JSON as a buffered one, a batch at a time."""
+    yield b'{"staff":['
+    separator = b""
+    async for batch in _staff_batches(statement, read_only):
+        yield separator + b",".join(encode_staff(row, fields) for row in batch)
+        separator = b","
+    yield b'],"next_cursor":null}'
 
 
 @router.post("/", response_model=StaffResponse, status_code=status.HTTP_201_CREATED)
 async def create_staff(
     staff_data: StaffRequest,
-    token: Token = Depends(get_auth_token),
-    db_session: Session = Depends(get_session)
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_session)
 ):
     """Create new staff member."""
     await require_user_or_agent(token, db_session)
 
+    now = datetime.now(timezone.utc)
     new_staff = Staff(
         name=staff_data.name,
         email=staff_data.email,
         schedule=staff_data.schedule or "{}",
         is_active=True,
-        created_at=datetime.now(timezone.utc),
-        updated_at=datetime.now(timezone.utc)
+        created_at=now,
+        updated_at=now
     )
 
     db_session.add(new_staff)
-    db_session.commit()
-    db_session.refresh(new_staff)
+    await db_session.run_sync(replace_staff_shifts, new_staff)
+    await db_session.commit()
+    await db_session.refresh(new_staff)
+    staff_events.publish(new_staff)
 
     return StaffResponse(
         id=new_staff.id,
@@ -78,59 +286,555 @@ async def create_staff(
     )
 
 
+@router.get("/on-shift", response_model=StaffListResponse)
+async def list_staff_on_shift(
+    at: Optional[datetime] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """
+    List active staff working at `at` (default: now), or at any moment in [`start`, `end`).
+
+    Naive datetimes are interpreted in the schedule timezone.
+    """
+    await require_user_or_agent(token, db_session)
+
+    if (start is None) != (end is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Both start and end are required for a range query"
+        )
+
+    if start is not None:
+        windows = windows_between(start, end)
+        if not windows:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="end must be after start"
+            )
+    else:
+        windows = windows_at(at or datetime.now(timezone.utc))
+
+    if SHIFT_LOOKUP_BACKEND == "sql":
+        on_shift = on_shift_clause(windows)
+    else:
+        await shift_index.refresh(db_session)
+        staff_ids = shift_index.on_shift(windows)
+        if not staff_ids:
+            return FastJSONResponse({"staff": [], "next_cursor": None})
+        on_shift = Staff.id.in_(staff_ids)
+
+    statement = (
+        select(*STAFF_COLUMNS)
+        .where(on_shift, Staff.is_active == True)
+        .order_by(Staff.name, Staff.id)
+    )
+    staff_members = (await db_session.exec(statement)).all()
+
+    return FastJSONResponse({"staff": [staff_dict(staff) for staff in staff_members], "next_cursor": None})
+
+
+@router.get("/search", response_model=StaffSearchResponse)
+async def search_staff(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=STAFF_SEARCH_MAX_LIMIT),
+    is_active: bool = None,
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """
+    Typeahead search over staff name and email.
+
+    Names starting with `q` rank first, then names or emails with a word
+    starting with `q`, then fuzzy (trigram) matches. Matching ignores case
+    and, on the in-memory backend, accents.
+    """
+    await require_user_or_agent(token, db_session)
+
+    if STAFF_SEARCH_BACKEND == "sql":
+        rows = (await db_session.execute(search_statement(q, limit, is_active))).all()
+        return FastJSONResponse({"staff": [row._asdict() for row in rows]})
+
+    await staff_search_index.refresh(db_session)
+    return FastJSONResponse({"staff": staff_search_index.search(q, limit, is_active)})
+
+
+@router.get("/changes", response_model=StaffChangesResponse)
+async def list_staff_changes(
+    since: Optional[str] = None,
+    limit: int = Query(STAFF_PAGE_MAX_LIMIT, ge=1, le=STAFF_PAGE_MAX_LIMIT),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """
+    Staff rows changed after the `since` watermark, including deactivations.
+
+    Omit `since` for an initial full sync. Pass the returned `watermark` as
+    `since` on the next call, and keep calling while `has_more` is true.
+    """
+    await require_user_or_agent(token, db_session)
+
+    position = _decode_watermark(since) if since else None
+    staff_members = await _changes_after(db_session, position, limit + 1)
+
+    has_more = len(staff_members) > limit
+    staff_members = staff_members[:limit]
+
+    return FastJSONResponse({
+        "staff": [staff_dict(staff) for staff in staff_members],
+        "watermark": staff_watermark(staff_members[-1]) if staff_members else since,
+        "has_more": has_more,
+    })
+
+
+@router.get("/events")
+async def stream_staff_events(
+    request: Request,
+    since: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """
+    Server-Sent Events stream of staff changes (`created`, `updated`, `deactivated`).
+
+    Each event id is its change-feed watermark. The stream resumes after
+    `since` or the `Last-Event-ID` header; without either it starts now.
+    """
+    await require_user_or_agent(token, db_session)
+
+    resume_from = since or last_event_id
+    if resume_from:
+        position = _decode_watermark(resume_from)
+    else:
+        latest = (await db_session.exec(
+            select(Staff).order_by(Staff.updated_at.desc(), Staff.id.desc()).limit(1)
+        )).first()
+        position = (naive_utc(latest.updated_at), latest.id) if latest else None
+
+    return StreamingResponse(
+        _stream_events(request, position),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def _decode_watermark(watermark: str) -> tuple[datetime, str]:
+    updated_at, staff_id = decode_cursor(watermark, 2)
+    try:
+        return datetime.fromisoformat(updated_at), staff_id
+    except (TypeError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid watermark"
+        )
+
+
+async def _changes_after(db_session: DatabaseSession, position: tuple[datetime, str] | None, limit: int):
+    statement = select(*STAFF_COLUMNS).order_by(Staff.updated_at, Staff.id).limit(limit)
+    if position is not None:
+        statement = statement.where(tuple_(Staff.updated_at, Staff.id) > tuple_(*position))
+    return (await db_session.exec(statement)).all()
+
+
+def _sse_event(staff) -> bytes:
+    header = f"id: {staff_watermark(staff)}\nevent: {change_event(staff)}\ndata: ".encode()
+    return header + dumps(staff_dict(staff)) + b"\n\n"
+
+
+async def _stream_events(request: Request, position: tuple[datetime, str] | None) -> AsyncIterator[bytes]:
+    """
+    Push local changes as they are published, and poll the database for rows
+    committed by other processes every STAFF_EVENTS_POLL_SECONDS.
+
+    `position` only advances through database polls, so a slow commit from
+    another process can't be skipped by a newer local event; rows already
+    pushed are remembered until a poll moves past them.
+    """
+    queue = staff_events.subscribe()
+    pushed: set[tuple[datetime, str]] = set()
+
+    async def poll() -> bytes:
+        nonlocal position, pushed
+        chunks = []
+        async with open_session(read_only=True) as db_session:
+            while True:
+                staff_members = await _changes_after(db_session, position, STAFF_PAGE_MAX_LIMIT)
+                for staff in staff_members:
+                    key = (naive_utc(staff.updated_at), staff.id)
+                    if key not in pushed:
+                        chunks.append(_sse_event(staff))
+                if staff_members:
+                    last = staff_members[-1]
+                    position = (naive_utc(last.updated_at), last.id)
+                if len(staff_members) < STAFF_PAGE_MAX_LIMIT:
+                    break
+        if position is not None:
+            pushed = {key for key in pushed if key > position}
+        return b"".join(chunks)
+
+    try:
+        backlog = await poll()
+        yield backlog or b": connected\n\n"
+
+        # A fixed deadline, so a steady stream of local events can't put off polling for other processes' writes
+        next_poll = time.monotonic() + STAFF_EVENTS_POLL_SECONDS
+        while not await request.is_disconnected():
+            try:
+                change = await asyncio.wait_for(queue.get(), timeout=max(0.0, next_poll - time.monotonic()))
+            except asyncio.TimeoutError:
+                change = None
+
+            if change is not None:
+                key = (naive_utc(change.staff.updated_at), change.staff.id)
+                if (position is None or key > position) and key not in pushed:
+                    pushed.add(key)
+                    yield _sse_event(change.staff)
+                if time.monotonic() < next_poll:
+                    continue
+
+            # Poll due or resync request: catch up from the database
+            yield await poll() or b": keep-alive\n\n"
+            next_poll = time.monotonic() + STAFF_EVENTS_POLL_SECONDS
+    finally:
+        staff_events.unsubscribe(queue)
+
+
+@router.get("/coverage", response_model=CoverageResponse)
+async def get_coverage(
+    slot_minutes: int = Query(30, ge=1, le=1440),
+    required_staff: int = Query(1, ge=0),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """
+    Weekly headcount of active staff per time slot, plus under-staffed gaps.
+
+    `slot_minutes` must divide a day evenly. A slot counts staff present for
+    the whole slot; gaps are runs of slots below `required_staff`.
+    """
+    await require_user_or_agent(token, db_session)
+
+    if 1440 % slot_minutes:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="slot_minutes must divide 1440 evenly"
+        )
+
+    await shift_index.refresh(db_session)
+    minute_counts = coverage_cache.minute_counts(shift_index)
+
+    return CoverageResponse(**coverage_report(minute_counts, slot_minutes, required_staff))
+
+
+@router.get("/conflicts", response_model=ScheduleConflictsResponse)
+async def get_schedule_conflicts(
+    role: Optional[str] = None,
+    capacity: int = Query(1, ge=1),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """
+    Schedule conflicts across all active staff.
+
+    Reports people with overlapping shifts, and shift roles held by more
+    than `capacity` people at the same time (e.g. a double-booked shift
+    manager). Pass `role` to check a single role.
+    """
+    await require_user_or_agent(token, db_session)
+
+    await shift_index.refresh(db_session)
+    conflicts = schedule_conflicts(shift_index.staff_shifts(), capacity, role)
+
+    return ScheduleConflictsResponse(capacity=capacity, conflicts=conflicts)
+
+
+@router.get("/shifts", response_model=DatedShiftsResponse)
+async def list_dated_shifts(
+    start: datetime,
+    end: datetime,
+    staff_id: Optional[List[str]] = Query(None),
+    accept: Optional[str] = Header(None),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """
+    Weekly schedules materialized into dated shifts over [start, end).
+
+    Times without an offset are read in the schedule timezone; shifts come
+    back in UTC and keep their local wall-clock times across DST changes.
+    Repeat `staff_id` to pick staff (default: all active staff). Send
+    `Accept: application/x-ndjson` to stream one shift per line.
+    """
+    await require_user_or_agent(token, db_session)
+
+    start, end = schedule_time_to_utc(start), schedule_time_to_utc(end)
+    if end <= start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must be after start"
+        )
+    if end - start > timedelta(days=SHIFT_RANGE_MAX_DAYS):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Range cannot exceed {SHIFT_RANGE_MAX_DAYS} days"
+        )
+
+    statement = select(Staff.id, Staff.schedule, Staff.updated_at).order_by(Staff.name, Staff.id)
+    if staff_id:
+        statement = statement.where(Staff.id.in_(staff_id))
+    else:
+        statement = statement.where(Staff.is_active == True)
+
+    if accept and NDJSON_MEDIA_TYPE in accept:
+        return StreamingResponse(
+            _stream_dated_shifts(statement, start, end, db_session.read_only), media_type=NDJSON_MEDIA_TYPE
+        )
+
+    rows = (await db_session.execute(statement)).all()
+    shifts = [shift for row in rows for shift in _dated_shift_dicts(row, start, end)]
+    return FastJSONResponse({"shifts": shifts})
+
+
+def _dated_shift_dicts(row, start: datetime, end: datetime) -> Iterator[dict]:
+    for shift in dated_shift_cache.shifts(row.id, row.updated_at, row.schedule, start, end):
+        yield {"staff_id": row.id, "start": shift.start, "end": shift.end, "role": shift.role or None}
+
+
+async def _stream_dated_shifts(statement, start: datetime, end: datetime, read_only: bool) -> AsyncIterator[bytes]:
+    """Yield NDJSON dated shifts, expanding staff a cursor batch at a time."""
+    async with open_session(read_only=read_only) as db_session:
+        batch = []
+        async for row in db_session.stream_rows(statement, STAFF_STREAM_BATCH_SIZE):
+            batch.extend(_dated_shift_dicts(row, start, end))
+            if len(batch) >= STAFF_STREAM_BATCH_SIZE:
+                yield b"".join(dumps(shift) + b"\n" for shift in batch)
+                batch = []
+        if batch:
+            yield b"".join(dumps(shift) + b"\n" for shift in batch)
+
+
+@router.post("/import", response_model=StaffImportResponse)
+async def import_staff(
+    request: Request,
+    import_format: Optional[str] = Query(None, alias="format", pattern="^(csv|ndjson)$"),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_session)
+):
+    """
+    Create staff members in bulk from a CSV or NDJSON request body.
+
+    The format comes from `format` or the Content-Type (`text/csv`,
+    `application/x-ndjson`). Columns: name, email, schedule, is_active.
+    Valid rows are inserted in batches; invalid rows are reported by line.
+    """
+    await require_user_or_agent(token, db_session)
+
+    content_type = request.headers.get("content-type", "")
+    if import_format is None:
+        if "csv" in content_type:
+            import_format = "csv"
+        elif "ndjson" in content_type:
+            import_format = "ndjson"
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send text/csv or application/x-ndjson, or pass format=csv|ndjson"
+            )
+
+    # Spool the upload so large files don't have to fit in memory
+    with tempfile.SpooledTemporaryFile(max_size=STAFF_IMPORT_SPOOL_BYTES) as spool:
+        async for chunk in request.stream():
+            spool.write(chunk)
+        spool.seek(0)
+        lines = io.TextIOWrapper(spool, encoding="utf-8-sig", newline="")
+        result = await db_session.run_sync(
+            import_staff_records, lines, import_format, STAFF_IMPORT_BATCH_SIZE
+        )
+
+    if result["created"]:
+        # Rows weren't loaded as objects; tell listeners to re-read
+        staff_events.publish(None)
+
+    return StaffImportResponse(**result)
+
+
+@router.get("/export")
+async def export_staff(
+    is_active: bool = None,
+    export_format: str = Query("csv", alias="format", pattern="^(csv|ndjson)$"),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """Stream all staff members as CSV or NDJSON. Optionally filter by active status."""
+    await require_user_or_agent(token, db_session)
+
+    statement = select(Staff).order_by(Staff.name, Staff.id)
+    if is_active is not None:
+        statement = statement.where(Staff.is_active == is_active)
+
+    media_type = "text/csv" if export_format == "csv" else NDJSON_MEDIA_TYPE
+    return StreamingResponse(
+        _stream_export(statement, export_format, db_session.read_only),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="staff.{export_format}"'}
+    )
+
+
+async def _stream_export(statement, export_format: str, read_only: bool) -> AsyncIterator[bytes]:
+    """Yield export chunks from a server-side cursor, one batch at a time."""
+    async with open_session(read_only=read_only) as db_session:
+        yield export_header(export_format).encode()
+        batch = []
+        async for staff in db_session.stream_scalars(statement, STAFF_STREAM_BATCH_SIZE):
+            batch.append(staff)
+            if len(batch) >= STAFF_STREAM_BATCH_SIZE:
+                yield export_rows(batch, export_format).encode()
+                batch = []
+        if batch:
+            yield export_rows(batch, export_format).encode()
+
+
+@router.get("/batch", response_model=StaffBatchResponse)
+async def get_staff_batch(
+    ids: List[str] = Query(...),
+    fields: Optional[str] = None,
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """
+    Resolve many staff ids in one query. Repeat `ids` or comma-separate them
+    (`ids=a,b,c`); POST the same to /staff/batch for longer lists.
+
+    Staff come back in request order; unknown ids are listed in `missing`.
+    Pass `fields` to return only those columns.
+    """
+    await require_user_or_agent(token, db_session)
+    return await _staff_batch([staff_id for value in ids for staff_id in value.split(",")], fields, db_session)
+
+
+@router.post("/batch", response_model=StaffBatchResponse)
+async def post_staff_batch(
+    batch: StaffBatchRequest,
+    fields: Optional[str] = None,
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
+):
+    """Same as GET /staff/batch, with the ids in the body."""
+    await require_user_or_agent(token, db_session)
+    return await _staff_batch(batch.ids, fields, db_session)
+
+
+async def _staff_batch(ids: list[str], fields: str | None, db_session: DatabaseSession) -> FastJSONResponse:
+    selected = parse_fields(fields)
+    # Request order, without duplicates or blanks
+    ids = list(dict.fromkeys(staff_id.strip() for staff_id in ids if staff_id.strip()))
+    if not ids or len(ids) > STAFF_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Send between 1 and {STAFF_BATCH_MAX_IDS} ids"
+        )
+
+    if staff_snapshot.serving:
+        records = (staff_snapshot.get(staff_id) for staff_id in ids)
+        found = {record.id: record for record in records if record is not None}
+    else:
+        statement = select(*staff_columns(selected, "id")).where(Staff.id.in_(ids))
+        rows = await _shared_read(
+            db_session, ("batch", tuple(sorted(ids)), selected), lambda session: _all(session, statement)
+        )
+        found = {row.id: row for row in rows}
+
+    return FastJSONResponse(
+        b'{"staff":' + encode_staff_array((found[staff_id] for staff_id in ids if staff_id in found), selected)
+        + b',"missing":' + dumps([staff_id for staff_id in ids if staff_id not in found]) + b"}"
+    )
+
+
 @router.get("/{staff_id}", response_model=StaffResponse)
 async def get_staff(
     staff_id: str,
-    token: Token = Depends(get_auth_token),
-    db_session: Session = Depends(get_session)
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_read_session)
 ):
-    """Get specific staff member by ID."""
+    """
+    Get specific staff member by ID. Supports If-None-Match with the returned ETag.
+
+    Pass `fields` (e.g. `id,name,is_active`) to select and return only those
+    columns. Use the ETag of the full representation for `If-Match` on PUT.
+    """
     await require_user_or_agent(token, db_session)
 
-    staff = db_session.get(Staff, staff_id)
+    selected = parse_fields(fields)
+    if staff_snapshot.serving:
+        staff = staff_snapshot.get(staff_id)
+    else:
+        statement = _get_statement(selected, staff_id)
+        staff = await _shared_read(
+            db_session, ("staff", staff_id, selected), lambda session: _first(session, statement)
+        )
     if not staff:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Staff member not found"
         )
 
-    return StaffResponse(
-        id=staff.id,
-        name=staff.name,
-        email=staff.email,
-        schedule=staff.schedule,
-        is_active=staff.is_active,
-        created_at=staff.created_at,
-        updated_at=staff.updated_at
-    )
+    etag = staff_etag(staff, None if selected == STAFF_FIELDS else selected)
+    if matches_if_none_match(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    return FastJSONResponse(encode_staff(staff, selected), headers={"ETag": etag})
 
 
 @router.put("/{staff_id}", response_model=StaffResponse)
 async def update_staff(
     staff_id: str,
     staff_data: StaffRequest,
-    token: Token = Depends(get_auth_token),
-    db_session: Session = Depends(get_session)
+    response: Response,
+    if_match: Optional[str] = Header(None),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_session)
 ):
-    """Update staff member name and/or schedule."""
+    """
+    Update staff member name and/or schedule.
+
+    Send the ETag from a previous read in `If-Match` to get
+    `412 Precondition Failed` instead of overwriting someone else's change.
+    The UPDATE is conditional on the version that was checked, so of two
+    requests sending the same ETag only the first succeeds.
+    """
     await require_user_or_agent(token, db_session)
 
-    staff = db_session.get(Staff, staff_id)
-    if not staff:
+    version = None
+    if if_match is not None:
+        current, version = await _versioned_staff(db_session, staff_id)
+        if not matches_if_match(if_match, staff_etag(current)):
+            raise HTTPException(
+                status_code=status.HTTP_412_PRECONDITION_FAILED,
+                detail="Staff member was modified by another request"
+            )
+
+    changes = {"name": staff_data.name, "email": staff_data.email, "schedule": staff_data.schedule or "{}"}
+    staff = await _update_staff_row(db_session, staff_id, changes, datetime.now(timezone.utc), version)
+    if staff is None and version is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Staff member not found"
         )
+    if staff is None:
+        raise HTTPException(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            detail="Staff member was modified by another request"
+        )
 
-    # Update staff data
-    staff.name = staff_data.name
-    staff.email = staff_data.email
-    staff.schedule = staff_data.schedule or "{}"
-    staff.updated_at = datetime.now(timezone.utc)
-
-    db_session.add(staff)
-    db_session.commit()
-    db_session.refresh(staff)
+    await db_session.run_sync(replace_staff_shifts, staff)
+    await db_session.commit()
+    staff_events.publish(staff)
+    response.headers["ETag"] = staff_etag(staff)
 
     return StaffResponse(
         id=staff.id,
@@ -143,16 +847,134 @@ async def update_staff(
     )
 
 
+@router.patch(
+    "/{staff_id}",
+    response_model=StaffResponse,
+    openapi_extra={"requestBody": {"required": True, "content": {
+        MERGE_PATCH_MEDIA_TYPE: {"schema": {"type": "object"}},
+        JSON_PATCH_MEDIA_TYPE: {"schema": {"type": "array", "items": {"type": "object"}}}
+    }}}
+)
+async def patch_staff(
+    staff_id: str,
+    request: Request,
+    content_type: Optional[str] = Header(None),
+    if_match: Optional[str] = Header(None),
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_session)
+):
+    """
+    Partially update name, email and/or schedule.
+
+    Send `application/merge-patch+json` (`{"schedule": {"friday": [...]}}`
+    replaces Friday only) or `application/json-patch+json` operations
+    (`{"op": "add", "path": "/schedule/friday/-", "value": {...}}`).
+
+    The change is one conditional UPDATE on the version that was read. With
+    `If-Match` (the ETag of a previous read) a concurrent change gives
+    `412 Precondition Failed`; without it the patch is re-applied on top of
+    the concurrent change. Merge patches that don't depend on the stored
+    row (name, email, a whole schedule string) skip the read entirely.
+    """
+    await require_user_or_agent(token, db_session)
+
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    if media_type == "application/json":
+        media_type = MERGE_PATCH_MEDIA_TYPE
+    if media_type not in (MERGE_PATCH_MEDIA_TYPE, JSON_PATCH_MEDIA_TYPE):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail=f"Send {MERGE_PATCH_MEDIA_TYPE} or {JSON_PATCH_MEDIA_TYPE}"
+        )
+    patch = parse_patch(await request.body(), media_type)
+    now = datetime.now(timezone.utc)
+
+    if if_match is None and patch and not needs_current(patch, media_type):
+        changes = staff_changes({}, patch)
+        staff = await _update_staff_row(db_session, staff_id, changes, now)
+        if staff is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Staff member not found"
+            )
+    else:
+        for _ in range(PATCH_ATTEMPTS):
+            current, version = await _versioned_staff(db_session, staff_id)
+            if not matches_if_match(if_match, staff_etag(current)):
+                raise HTTPException(
+                    status_code=status.HTTP_412_PRECONDITION_FAILED,
+                    detail="Staff member was modified by another request"
+                )
+
+            document = staff_document(current.name, current.email, current.schedule)
+            changes = staff_changes(document, apply_patch(document, patch, media_type))
+            if not changes:
+                return FastJSONResponse(staff_dict(current), headers={"ETag": staff_etag(current)})
+
+            staff = await _update_staff_row(db_session, staff_id, changes, now, version)
+            if staff is not None:
+                break
+            # Someone else wrote first: start over from a fresh snapshot
+            await db_session.rollback()
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Staff member is being modified concurrently; retry"
+            )
+
+    if "schedule" in changes:
+        await db_session.run_sync(replace_staff_shifts, staff)
+    await db_session.commit()
+    staff_events.publish(staff)
+
+    return FastJSONResponse(staff_dict(staff), headers={"ETag": staff_etag(staff)})
+
+
+async def _versioned_staff(db_session: DatabaseSession, staff_id: str) -> tuple[Staff, Any]:
+    """The stored row and its version, for a conditional _update_staff_row. Raises 404."""
+    row = (await db_session.execute(select(*STAFF_COLUMNS, STAFF_VERSION.label("version")).where(Staff.id == staff_id))).first()
+    if not row:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Staff member not found"
+        )
+    *values, version = row
+    return Staff(**dict(zip(STAFF_FIELDS, values))), version
+
+
+async def _update_staff_row(
+    db_session: DatabaseSession,
+    staff_id: str,
+    changes: dict,
+    updated_at: datetime,
+    version=None
+) -> Staff | None:
+    """UPDATE ... RETURNING, only if the row still has `version` (when given). None if no row matched."""
+    statement = (
+        update(Staff)
+        .where(Staff.id == staff_id)
+        .values(**changes, updated_at=updated_at)
+        .returning(*STAFF_COLUMNS)
+        .execution_options(synchronize_session=False)
+    )
+    if version is not None:
+        statement = statement.where(STAFF_VERSION == version)
+
+    # Through run_sync, so SQLite writers queue on the write lock like every other write
+    row = await db_session.run_sync(lambda session: session.execute(statement).first())
+    return Staff(**row._asdict()) if row else None
+
+
 @router.delete("/{staff_id}", response_model=MessageResponse)
 async def delete_staff(
     staff_id: str,
-    token: Token = Depends(get_auth_token),
-    db_session: Session = Depends(get_session)
+    token: AuthIdentity = Depends(get_auth_token),
+    db_session: DatabaseSession = Depends(get_session)
 ):
     """Soft delete staff member by setting is_active=False."""
     await require_user_or_agent(token, db_session)
 
-    staff = db_session.get(Staff, staff_id)
+    staff = await db_session.get(Staff, staff_id)
     if not staff:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -163,6 +985,7 @@ async def delete_staff(
     staff.updated_at = datetime.now(timezone.utc)
 
     db_session.add(staff)
-    db_session.commit()
+    await db_session.commit()
+    staff_events.publish(staff)
 
     return MessageResponse(message=f"Staff member {staff.name} deactivated successfully")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Concurrent-request throughput with the sync vs async database session.
+
+Seeds a throwaway SQLite database, then runs the same concurrent workload
+against `main.app` twice in separate processes: once with DB_ASYNC=false
+(queries block the event loop) and once with DB_ASYNC=true.
+
+On a local SQLite file each query takes microseconds, so the async path
+mostly measures aiosqlite's thread hand-off overhead. The gain shows up
+when queries wait on the network (Postgres), where a blocked event loop
+stalls every in-flight request on the worker.
+
+Usage:
+    python -m benchmarks.async_session
+    python -m benchmarks.async_session --staff 5000 --requests 2000 --concurrency 100
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+
+def percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_workload(requests: int, concurrency: int, token: str) -> dict:
+    """Fire `requests` GETs at the app with at most `concurrency` in flight."""
+    import httpx
+    from main import app
+
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        listing = await client.get("/staff-timetable/api/staff/", headers=headers)
+        staff_ids = [s["id"] for s in listing.json()["staff"]][:200]
+
+        semaphore = asyncio.Semaphore(concurrency)
+        latencies = []
+
+        async def one(i: int):
+            # Mostly point lookups with an occasional full listing
+            url = (
+                "/staff-timetable/api/staff/?is_active=true" if i % 20 == 0
+                else f"/staff-timetable/api/staff/{staff_ids[i % len(staff_ids)]}"
+            )
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(url, headers=headers)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+    }
+
+
+def run_child(args):
+    result = asyncio.run(run_workload(args.requests, args.concurrency, args.token))
+    result["db_async"] = os.environ.get("DB_ASYNC") == "true"
+    print(json.dumps(result))
+
+
+def run_parent(args):
+    from benchmarks.seed import seed_database
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_path = os.path.join(tmp, "bench.db")
+        token = seed_database(sqlite_path, args.staff)[0]
+
+        results = {}
+        for mode in ("false", "true"):
+            # One shared token for every client, and no admission cap: this compares raw session throughput
+            env = {
+                **os.environ, "DB_BACKEND": "sqlite", "SQLITE_PATH": sqlite_path, "DB_ASYNC": mode,
+                "RATE_LIMIT_PER_SECOND": "0", "ADMISSION_MAX_CONCURRENCY": "0"
+            }
+            completed = subprocess.run(
+                [sys.executable, "-m", "benchmarks.async_session", "--child",
+                 "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                 "--token", token],
+                env=env, capture_output=True, text=True, check=True
+            )
+            results["async" if mode == "true" else "sync"] = json.loads(completed.stdout.strip().splitlines()[-1])
+
+    results["speedup"] = round(results["async"]["throughput_rps"] / results["sync"]["throughput_rps"], 2)
+    print(json.dumps(results, indent=2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--staff", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+    else:
+        run_parent(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Load test of every staff endpoint with a regression check against a baseline.
+
+Seeds a throwaway SQLite database (1k-100k staff with realistic schedules),
+then drives `main.app` in a child process with a fixed, seeded mix of reads
+and writes over all routes of api/staff_timetable.py, `concurrency` requests
+in flight. Prints throughput and p50/p95/p99 latency per scenario as JSON.
+
+With --baseline, each scenario is compared against a stored report and the
+process exits with status 1 if its p95 grew or its throughput dropped by
+more than --tolerance. Baselines are machine specific: record one with
+--save-baseline on the machine that runs the comparison.
+
+GET /staff/events is not included: it is a long-lived stream, not a
+request/response route.
+
+Usage:
+    python -m benchmarks.load --save-baseline benchmarks/baseline.json
+    python -m benchmarks.load --baseline benchmarks/baseline.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
+
+from benchmarks.async_session import percentile
+from benchmarks.seed import random_schedule
+
+API = "/staff-timetable/api/staff"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Monday of an arbitrary week; on-shift queries pick moments inside it
+WEEK_START = datetime(2026, 1, 5)
+
+
+@dataclass
+class Context:
+    """State shared by the scenarios of one run."""
+    headers: dict
+    rng: random.Random
+    staff_ids: list[str]
+    etags: dict[str, str] = field(default_factory=dict)
+    created_ids: list[str] = field(default_factory=list)
+    counter: int = 0
+
+    def staff_id(self) -> str:
+        return self.rng.choice(self.staff_ids)
+
+    def next_number(self) -> int:
+        self.counter += 1
+        return self.counter
+
+
+async def list_page(client, ctx):
+    return await client.get(f"{API}/", params={"is_active": "true", "limit": 50}, headers=ctx.headers)
+
+
+async def list_ndjson(client, ctx):
+    headers = {**ctx.headers, "Accept": NDJSON_MEDIA_TYPE}
+    return await client.get(f"{API}/", params={"is_active": "true"}, headers=headers)
+
+
+async def get_one(client, ctx):
+    staff_id = ctx.staff_id()
+    response = await client.get(f"{API}/{staff_id}", headers=ctx.headers)
+    if "etag" in response.headers:
+        ctx.etags[staff_id] = response.headers["etag"]
+    return response
+
+
+async def get_conditional(client, ctx):
+    if not ctx.etags:
+        return await get_one(client, ctx)
+    staff_id = ctx.rng.choice(list(ctx.etags))
+    headers = {**ctx.headers, "If-None-Match": ctx.etags[staff_id]}
+    return await client.get(f"{API}/{staff_id}", headers=headers)
+
+
+async def on_shift_at(client, ctx):
+    moment = WEEK_START + timedelta(minutes=ctx.rng.randrange(7 * 24 * 60))
+    return await client.get(f"{API}/on-shift", params={"at": moment.isoformat()}, headers=ctx.headers)
+
+
+async def on_shift_range(client, ctx):
+    start = WEEK_START + timedelta(minutes=ctx.rng.randrange(7 * 24 * 60))
+    end = start + timedelta(hours=ctx.rng.choice([1, 2, 4]))
+    params = {"start": start.isoformat(), "end": end.isoformat()}
+    return await client.get(f"{API}/on-shift", params=params, headers=ctx.headers)
+
+
+async def changes(client, ctx):
+    return await client.get(f"{API}/changes", params={"limit": 100}, headers=ctx.headers)
+
+
+async def coverage(client, ctx):
+    params = {"slot_minutes": ctx.rng.choice([15, 30, 60]), "required_staff": 2}
+    return await client.get(f"{API}/coverage", params=params, headers=ctx.headers)
+
+
+async def export_csv(client, ctx):
+    return await client.get(f"{API}/export", params={"format": "csv", "is_active": "true"}, headers=ctx.headers)
+
+
+async def create(client, ctx):
+    number = ctx.next_number()
+    payload = {
+        "name": f"Bench New {number}",
+        "email": f"new{number}@example.com",
+        "schedule": json.dumps(random_schedule(ctx.rng)),
+    }
+    response = await client.post(f"{API}/", json=payload, headers=ctx.headers)
+    if response.status_code == 201:
+        ctx.created_ids.append(response.json()["id"])
+    return response
+
+
+async def update(client, ctx):
+    staff_id = ctx.staff_id()
+    payload = {"name": f"Bench Updated {ctx.next_number()}", "schedule": json.dumps(random_schedule(ctx.rng))}
+    return await client.put(f"{API}/{staff_id}", json=payload, headers=ctx.headers)
+
+
+async def delete(client, ctx):
+    if not ctx.created_ids:
+        return await create(client, ctx)
+    staff_id = ctx.created_ids.pop(ctx.rng.randrange(len(ctx.created_ids)))
+    return await client.delete(f"{API}/{staff_id}", headers=ctx.headers)
+
+
+async def import_csv(client, ctx):
+    lines = ["name,email,schedule,is_active"]
+    for _ in range(20):
+        number = ctx.next_number()
+        schedule = json.dumps(random_schedule(ctx.rng)).replace('"', '""')
+        lines.append(f'Bench Import {number},import{number}@example.com,"{schedule}",true')
+    body = "\n".join(lines) + "\n"
+    headers = {**ctx.headers, "Content-Type": "text/csv"}
+    return await client.post(f"{API}/import", content=body.encode(), headers=headers)
+
+
+@dataclass(frozen=True)
+class Scenario:
+    route: str
+    weight: int
+    run: Callable[..., Awaitable]
+
+
+# Read-heavy mix; weights are relative
+SCENARIOS = {
+    "get": Scenario("GET /staff/{staff_id}", 30, get_one),
+    "get_conditional": Scenario("GET /staff/{staff_id} (If-None-Match)", 10, get_conditional),
+    "list_page": Scenario("GET /staff/", 15, list_page),
+    "list_ndjson": Scenario("GET /staff/ (NDJSON)", 1, list_ndjson),
+    "on_shift_at": Scenario("GET /staff/on-shift?at", 10, on_shift_at),
+    "on_shift_range": Scenario("GET /staff/on-shift?start&end", 3, on_shift_range),
+    "changes": Scenario("GET /staff/changes", 5, changes),
+    "coverage": Scenario("GET /staff/coverage", 3, coverage),
+    "export": Scenario("GET /staff/export", 1, export_csv),
+    "create": Scenario("POST /staff/", 5, create),
+    "update": Scenario("PUT /staff/{staff_id}", 5, update),
+    "delete": Scenario("DELETE /staff/{staff_id}", 2, delete),
+    "import": Scenario("POST /staff/import", 1, import_csv),
+}
+
+
+def summarize(latencies: list[float], errors: int, elapsed: float) -> dict:
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2) if count else None,
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2) if count else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2) if count else None,
+    }
+
+
+async def run_workload(requests: int, concurrency: int, warmup: int, token: str, seed: int) -> dict:
+    """Run the scenario mix against the app; the first `warmup` requests are not recorded."""
+    import httpx
+    from main import app
+
+    rng = random.Random(seed)
+    names = list(SCENARIOS)
+    weights = [SCENARIOS[name].weight for name in names]
+    plan = rng.choices(names, weights=weights, k=warmup + requests)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        headers = {"Authorization": f"Bearer {token}"}
+        listing = await client.get(f"{API}/", params={"limit": 500}, headers=headers)
+        listing.raise_for_status()
+        ctx = Context(headers=headers, rng=rng, staff_ids=[s["id"] for s in listing.json()["staff"]])
+
+        latencies: dict[str, list[float]] = {name: [] for name in names}
+        errors: dict[str, int] = {name: 0 for name in names}
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(name: str, record: bool):
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await SCENARIOS[name].run(client, ctx)
+                    failed = response.status_code >= 400
+                except Exception:
+                    failed = True
+                if record:
+                    latencies[name].append(time.perf_counter() - started)
+                    errors[name] += failed
+
+        await asyncio.gather(*(one(name, False) for name in plan[:warmup]))
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(name, True) for name in plan[warmup:]))
+        elapsed = time.perf_counter() - started
+
+    all_latencies = [value for values in latencies.values() for value in values]
+    return {
+        "total": {**summarize(all_latencies, sum(errors.values()), elapsed), "elapsed_s": round(elapsed, 3)},
+        "routes": {
+            name: {"route": SCENARIOS[name].route, **summarize(latencies[name], errors[name], elapsed)}
+            for name in names if latencies[name]
+        },
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_delta_ms: float) -> dict:
+    """
+    Per-scenario change against a baseline report.
+
+    A scenario regresses when its p95 grows by more than `tolerance` (and by
+    at least `min_delta_ms`, so sub-millisecond noise doesn't count) or its
+    throughput drops by more than `tolerance`.
+    """
+    result = {}
+    for name, current in report["routes"].items():
+        previous = baseline.get("routes", {}).get(name)
+        if previous is None or not previous.get("p95_ms"):
+            continue
+        p95_change = current["p95_ms"] / previous["p95_ms"] - 1
+        throughput_change = current["throughput_rps"] / previous["throughput_rps"] - 1
+        result[name] = {
+            "p95_ms": [previous["p95_ms"], current["p95_ms"]],
+            "p95_change": round(p95_change, 3),
+            "throughput_rps": [previous["throughput_rps"], current["throughput_rps"]],
+            "throughput_change": round(throughput_change, 3),
+            "regressed": (
+                (p95_change > tolerance and current["p95_ms"] - previous["p95_ms"] >= min_delta_ms)
+                or throughput_change < -tolerance
+            ),
+        }
+    return result
+
+
+def run_child(args):
+    result = asyncio.run(run_workload(args.requests, args.concurrency, args.warmup, args.token, args.seed))
+    print(json.dumps(result))
+
+
+def run_parent(args) -> int:
+    from benchmarks.seed import seed_database
+
+    config = {
+        "staff": args.staff,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "seed": args.seed,
+        "db_async": args.db_async,
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sqlite_path = os.path.join(tmp, "bench.db")
+        token = seed_database(sqlite_path, args.staff, seed=args.seed)[0]
+        env = {
+            **os.environ,
+            "DB_BACKEND": "sqlite",
+            "SQLITE_PATH": sqlite_path,
+            "DB_ASYNC": "true" if args.db_async else "false",
+            "SLOW_REQUEST_SECONDS": "0",
+            # Every simulated client shares one seeded token, i.e. one identity, so the per-identity rate
+            # limit stays off whatever the environment sets; admission control stays on, as deployed
+            "RATE_LIMIT_PER_SECOND": "0",
+        }
+        completed = subprocess.run(
+            [sys.executable, "-m", "benchmarks.load", "--child",
+             "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+             "--warmup", str(args.warmup), "--seed", str(args.seed), "--token", token],
+            env=env, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            sys.stderr.write(completed.stderr)
+            return completed.returncode
+
+    report = {"config": config, **json.loads(completed.stdout.strip().splitlines()[-1])}
+    exit_code = 0
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatched = {
+            key: [baseline["config"].get(key), value]
+            for key, value in config.items()
+            if key in ("staff", "requests", "concurrency", "seed", "db_async") and baseline["config"].get(key) != value
+        }
+        report["comparison"] = {
+            "baseline": args.baseline,
+            "config_mismatch": mismatched,
+            "routes": compare(report, baseline, args.tolerance, args.min_delta_ms),
+        }
+        if any(route["regressed"] for route in report["comparison"]["routes"].values()):
+            exit_code = 1
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+
+    print(json.dumps(report, indent=2))
+    return exit_code
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--staff", type=int, default=5000, help="Seeded staff rows (1k-100k)")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=200, help="Requests run before measuring")
+    parser.add_argument("--seed", type=int, default=42, help="Seed for data and request mix")
+    parser.add_argument("--db-async", action="store_true", help="Run the app with DB_ASYNC=true")
+    parser.add_argument("--baseline", help="Report to compare against")
+    parser.add_argument("--save-baseline", help="Write this run's report to the given path")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed relative regression")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="Ignore p95 growth below this")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--token", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args)
+    else:
+        sys.exit(run_parent(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Synthetic data for benchmarks.
+
+Creates a throwaway SQLite database with the shared auth tables, one user
+token per benchmark client and `staff_count` Staff rows (plus their
+staff_shift rows) with realistic weekly schedules. Never point this at a
+real database.
+"""
+
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from sqlmodel import SQLModel, Session, create_engine
+
+import models  # noqa: F401 - registers every table on SQLModel.metadata
+from models.auth import User, Token, TokenUser
+from models.staff_models import Staff, StaffShift
+from helpers.staff_shifts import shift_rows
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+FIRST_NAMES = ["Ana", "Luis", "María", "Carlos", "Sofía", "Jorge", "Lucía", "Pedro", "Elena", "Diego"]
+LAST_NAMES = ["García", "López", "Martínez", "Hernández", "Pérez", "Sánchez", "Ramírez", "Torres"]
+
+
+def random_schedule(rng: random.Random) -> dict:
+    """Weekly schedule with one or two shifts on four to six working days."""
+    schedule = {}
+    for day in rng.sample(WEEKDAYS, rng.randint(4, 6)):
+        start = rng.choice([6, 7, 8, 9, 10, 12, 14])
+        if rng.random() < 0.2:
+            # Split shift
+            schedule[day] = [
+                {"start": f"{start:02d}:00", "end": f"{start + 4:02d}:00"},
+                {"start": f"{start + 5:02d}:00", "end": f"{start + 9:02d}:00"},
+            ]
+        else:
+            schedule[day] = [{"start": f"{start:02d}:00", "end": f"{start + 8:02d}:30"}]
+    return schedule
+
+
+# Rows inserted per executemany, so 100k staff don't sit in memory at once
+INSERT_BATCH_SIZE = 5000
+
+
+def seed_database(sqlite_path: str, staff_count: int, token_count: int = 1, seed: int = 42) -> list[str]:
+    """Create tables and rows. Returns the access tokens that were created."""
+    rng = random.Random(seed)
+    engine = create_engine(f"sqlite:///{sqlite_path}")
+    SQLModel.metadata.create_all(engine)
+
+    now = datetime.now(timezone.utc)
+    access_tokens = []
+    with Session(engine) as session:
+        for i in range(token_count):
+            user = User(username=f"bench_user_{i}", hashed_password="!")
+            token = Token(access_token=f"bench-token-{i}", expires_at=now + timedelta(days=1))
+            session.add(user)
+            session.add(token)
+            session.add(TokenUser(token_id=token.id, user_id=user.id))
+            access_tokens.append(token.access_token)
+
+        for batch_start in range(0, staff_count, INSERT_BATCH_SIZE):
+            rows = []
+            for i in range(batch_start, min(batch_start + INSERT_BATCH_SIZE, staff_count)):
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {i}"
+                rows.append(Staff(
+                    name=name,
+                    email=f"staff{i}@example.com",
+                    schedule=json.dumps(random_schedule(rng)),
+                    is_active=rng.random() > 0.1,
+                    created_at=now,
+                    updated_at=now
+                ).model_dump())
+            session.bulk_insert_mappings(Staff, rows)
+            session.bulk_insert_mappings(
+                StaffShift, [shift for row in rows for shift in shift_rows(row["id"], row["schedule"])]
+            )
+            session.commit()
+
+    engine.dispose()
+    return access_tokens
@@ -1,30 +1,331 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable
+from fastapi import Depends, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
 from sqlmodel import Session, create_engine
-from settings import DATABASE_URL, logger
-
-# Create engine with appropriate settings for the database type
-if DATABASE_URL.startswith("sqlite"):
-    # SQLite settings
-    engine = create_engine(
-        DATABASE_URL,
-        echo=False,
-        connect_args={"check_same_thread": False}
-    )
-    logger.info(f"Database engine created: SQLite")
-elif DATABASE_URL.startswith("postgresql"):
-    # PostgreSQL settings
-    engine = create_engine(
-        DATABASE_URL,
-        echo=False,
-        pool_pre_ping=True,
-        pool_size=10,
-        max_overflow=20
-    )
-    logger.info(f"Database engine created: PostgreSQL")
-else:
-    raise ValueError(f"Unsupported database URL: {DATABASE_URL}")
-
-
-def get_session():
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from settings import (
+    DATABASE_URL, ASYNC_DATABASE_URL, READ_DATABASE_URL, ASYNC_READ_DATABASE_URL, DB_ASYNC,
+    DB_POOL_SIZE, DB_MAX_OVERFLOW, READ_AFTER_WRITE_SECONDS,
+    SQLITE_PROFILE, SQLITE_MMAP_BYTES, SQLITE_BUSY_TIMEOUT_MS, logger
+)
+from helpers.cache import TTLCache
+from helpers.metrics import instrument_engine, register_pool_gauges, timed_async_queue_pool, timed_queue_pool
+
+
+def _sqlite_production_pragmas(dbapi_connection, connection_record) -> None:
+    """WAL lets readers run alongside the writer; NORMAL sync is durable across app crashes."""
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_BYTES}")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+
+def _create_engine(url: str, name: str) -> Engine:
+    if url.startswith("sqlite"):
+        if SQLITE_PROFILE == "production":
+            engine = create_engine(
+                url,
+                echo=False,
+                connect_args={"check_same_thread": False},
+                poolclass=timed_queue_pool(name),
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW
+            )
+            event.listen(engine, "connect", _sqlite_production_pragmas)
+        else:
+            engine = create_engine(
+                url,
+                echo=False,
+                connect_args={"check_same_thread": False}
+            )
+        logger.info(f"Database engine created: SQLite ({SQLITE_PROFILE} profile)")
+    elif url.startswith("postgresql"):
+        engine = create_engine(
+            url,
+            echo=False,
+            poolclass=timed_queue_pool(name),
+            pool_pre_ping=True,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW
+        )
+        logger.info(f"Database engine created: PostgreSQL ({name})")
+    else:
+        raise ValueError(f"Unsupported database URL: {url}")
+    return engine
+
+
+def _create_async_engine(url: str, name: str) -> AsyncEngine:
+    if url.startswith("sqlite"):
+        if SQLITE_PROFILE == "production":
+            async_engine = create_async_engine(
+                url,
+                echo=False,
+                poolclass=timed_async_queue_pool(name),
+                pool_size=DB_POOL_SIZE,
+                max_overflow=DB_MAX_OVERFLOW
+            )
+            event.listen(async_engine.sync_engine, "connect", _sqlite_production_pragmas)
+        else:
+            async_engine = create_async_engine(url, echo=False)
+        logger.info(f"Async database engine created: SQLite (aiosqlite, {SQLITE_PROFILE} profile)")
+    else:
+        async_engine = create_async_engine(
+            url,
+            echo=False,
+            poolclass=timed_async_queue_pool(name),
+            pool_pre_ping=True,
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW
+        )
+        logger.info(f"Async database engine created: PostgreSQL (asyncpg, {name})")
+    return async_engine
+
+
+_engines_started = time.perf_counter()
+
+# Primary engine. Also used by manage.py.
+engine = _create_engine(DATABASE_URL, "sync")
+
+# Async engine used by request handlers when DB_ASYNC is enabled.
+async_engine = _create_async_engine(ASYNC_DATABASE_URL, "async") if DB_ASYNC else None
+
+# Read replica engines for GET routes; without a replica reads use the primary
+read_engine = engine
+async_read_engine = async_engine
+if READ_DATABASE_URL:
+    read_engine = _create_engine(READ_DATABASE_URL, "read")
+    if DB_ASYNC:
+        async_read_engine = _create_async_engine(ASYNC_READ_DATABASE_URL, "async_read")
+
+# Reported by the startup report (helpers/warmup.py)
+engine_creation_seconds = time.perf_counter() - _engines_started
+
+
+def _engines() -> dict:
+    engines = {"sync": engine}
+    if async_engine is not None:
+        engines["async"] = async_engine.sync_engine
+    if read_engine is not engine:
+        engines["read"] = read_engine
+    if async_read_engine is not async_engine:
+        engines["async_read"] = async_read_engine.sync_engine
+    return engines
+
+
+def dispose_engines_after_fork() -> None:
+    """
+    Drop the pooled connections inherited from the parent process (gunicorn post_fork).
+
+    close=False leaves them to the parent; the worker opens its own on first use.
+    """
+    for pooled_engine in _engines().values():
+        pooled_engine.dispose(close=False)
+
+
+for _name, _engine in _engines().items():
+    instrument_engine(_engine, _name)
+register_pool_gauges(_engines)
+
+# Clients (keyed by Authorization header) that wrote recently; their reads stay on the primary
+recent_writers = TTLCache(max_size=10000, ttl_seconds=READ_AFTER_WRITE_SECONDS)
+
+# SQLite allows one writer at a time. In the production profile writers queue on this lock
+# instead of holding the file lock across event-loop turns while others spin on busy_timeout.
+sqlite_write_lock = (
+    asyncio.Lock() if DATABASE_URL.startswith("sqlite") and SQLITE_PROFILE == "production" else None
+)
+
+
+class DatabaseSession:
+    """
+    Awaitable facade over a sync Session or an AsyncSession.
+
+    Handlers always `await` database calls through this wrapper, so the same
+    code runs unchanged whether DB_ASYNC is enabled or not.
+    """
+
+    def __init__(
+        self,
+        session: Session | AsyncSession,
+        read_only: bool = False,
+        write_lock: asyncio.Lock | None = None
+    ):
+        self.session = session
+        self.is_async = isinstance(session, AsyncSession)
+        # True when bound to the read replica
+        self.read_only = read_only
+        # Held from the first write until commit/rollback/close
+        self._write_lock = write_lock
+        self._holds_write_lock = False
+
+    async def _begin_write(self) -> None:
+        if self._write_lock is not None and not self._holds_write_lock:
+            await self._write_lock.acquire()
+            self._holds_write_lock = True
+
+    def end_write(self) -> None:
+        if self._holds_write_lock:
+            self._holds_write_lock = False
+            self._write_lock.release()
+
+    async def exec(self, statement: Any) -> Any:
+        if self.is_async:
+            return await self.session.exec(statement)
+        return self.session.exec(statement)
+
+    async def execute(self, statement: Any, params: Any = None) -> Any:
+        if self.is_async:
+            return await self.session.execute(statement, params)
+        return self.session.execute(statement, params)
+
+    async def get(self, model: Any, ident: Any) -> Any:
+        if self.is_async:
+            return await self.session.get(model, ident)
+        return self.session.get(model, ident)
+
+    def add(self, instance: Any) -> None:
+        self.session.add(instance)
+
+    async def flush(self) -> None:
+        await self._begin_write()
+        if self.is_async:
+            await self.session.flush()
+        else:
+            self.session.flush()
+
+    async def commit(self) -> None:
+        await self._begin_write()
+        try:
+            if self.is_async:
+                await self.session.commit()
+            else:
+                self.session.commit()
+        finally:
+            self.end_write()
+
+    async def rollback(self) -> None:
+        try:
+            if self.is_async:
+                await self.session.rollback()
+            else:
+                self.session.rollback()
+        finally:
+            self.end_write()
+
+    async def release(self) -> None:
+        """Hand the connection back to the pool until the next query; loaded objects stay readable, detached."""
+        if self.is_async:
+            await self.session.close()
+        else:
+            self.session.close()
+
+    async def refresh(self, instance: Any) -> None:
+        if self.is_async:
+            await self.session.refresh(instance)
+        else:
+            self.session.refresh(instance)
+
+    async def stream_scalars(self, statement: Any, batch_size: int) -> AsyncIterator[Any]:
+        """Yield rows from a server-side cursor, fetching batch_size rows at a time."""
+        statement = statement.execution_options(yield_per=batch_size)
+        if self.is_async:
+            result = await self.session.stream_scalars(statement)
+            async for row in result:
+                yield row
+        else:
+            for row in self.session.scalars(statement):
+                yield row
+
+    async def stream_rows(self, statement: Any, batch_size: int) -> AsyncIterator[Any]:
+        """Like stream_scalars, but yield whole rows (for multi-column selects)."""
+        statement = statement.execution_options(yield_per=batch_size)
+        if self.is_async:
+            result = await self.session.stream(statement)
+            async for row in result:
+                yield row
+        else:
+            for row in self.session.execute(statement):
+                yield row
+
+    async def run_sync(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(sync_session, *args) in either mode, for code written against Session (may write)."""
+        await self._begin_write()
+        if self.is_async:
+            return await self.session.run_sync(fn, *args, **kwargs)
+        return fn(self.session, *args, **kwargs)
+
+
+@asynccontextmanager
+async def open_session(
+    read_only: bool = False,
+    on_commit: Callable[[], None] | None = None
+) -> AsyncIterator[DatabaseSession]:
+    """
+    Open a session on the async engine if enabled, otherwise on the sync engine.
+
+    read_only sessions use the replica when one is configured.
+    """
+    read_only = read_only and read_engine is not engine
+    sync_engine, session_async_engine = (read_engine, async_read_engine) if read_only else (engine, async_engine)
+    write_lock = None if read_only else sqlite_write_lock
+    db_session = None
+    try:
+        # Objects stay readable after commit without lazy reloads, which an AsyncSession can't do
+        if session_async_engine is not None:
+            async with AsyncSession(session_async_engine, expire_on_commit=False) as session:
+                db_session = DatabaseSession(session, read_only, write_lock)
+                if on_commit is not None:
+                    event.listen(session.sync_session, "after_commit", lambda _: on_commit())
+                yield db_session
+        else:
+            with Session(sync_engine, expire_on_commit=False) as session:
+                db_session = DatabaseSession(session, read_only, write_lock)
+                if on_commit is not None:
+                    event.listen(session, "after_commit", lambda _: on_commit())
+                yield db_session
+    finally:
+        # Only after the session is closed, so an unfinished write is rolled back first
+        if db_session is not None:
+            db_session.end_write()
+
+
+def _client_key(request: Request) -> str | None:
+    return request.headers.get("authorization")
+
+
+async def get_session(request: Request) -> AsyncIterator[DatabaseSession]:
     """Dependency for getting database sessions in FastAPI endpoints."""
-    with Session(engine) as session:
+    client_key = _client_key(request)
+
+    def remember_write():
+        if client_key:
+            recent_writers.set(client_key, True)
+
+    async with open_session(on_commit=remember_write) as session:
+        yield session
+
+
+async def get_read_session(
+    request: Request,
+    primary_session: DatabaseSession = Depends(get_session)
+) -> AsyncIterator[DatabaseSession]:
+    """
+    Dependency for read-only endpoints: uses the replica, except for clients
+    that wrote within READ_AFTER_WRITE_SECONDS, so they read their own writes.
+
+    Otherwise it is the request's primary session, the one authentication
+    uses too, so a request holds at most one primary connection.
+    """
+    client_key = _client_key(request)
+    if read_engine is engine or (client_key and recent_writers.get(client_key)):
+        yield primary_session
+        return
+    async with open_session(read_only=True) as session:
         yield session
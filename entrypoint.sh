@@ -3,6 +3,9 @@ set -e
 
 case "$1" in
   "fastapi")
+    if [ "${WEB_CONCURRENCY:-1}" -gt 1 ]; then
+      exec gunicorn -c gunicorn.conf.py main:app
+    fi
     exec fastapi run main.py --host 0.0.0.0 --port 8002
     ;;
   "manage_init_db")
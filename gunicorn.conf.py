@@ -0,0 +1,15 @@
+# Multi-worker mode, used by entrypoint.sh when WEB_CONCURRENCY > 1:
+#   gunicorn -c gunicorn.conf.py main:app
+from settings import WEB_CONCURRENCY
+
+bind = "0.0.0.0:8002"
+workers = WEB_CONCURRENCY
+worker_class = "uvicorn_worker.UvicornWorker"
+# Import the app once in the master; workers share its pages copy-on-write and start faster
+preload_app = True
+
+
+def post_fork(server, worker):
+    """Each worker gets its own connection pools: connections opened before the fork can't be shared."""
+    from database import dispose_engines_after_fork
+    dispose_engines_after_fork()
@@ -1,16 +1,111 @@
+from dataclasses import dataclass
+import jwt
 from fastapi import Depends, HTTPException, status, Header
-from sqlmodel import Session, select
+from sqlmodel import select
 from sqlalchemy.orm import joinedload
 from models.auth import Token, Agent, TokenUser, TokenAgent, User
-from database import get_session
+from database import DatabaseSession, get_session
+from helpers.cache import TTLCache
+from helpers.revocations import revocation_list
+from helpers.throttling import rate_limiter
+from settings import (
+    AUTH_CACHE_ENABLED, AUTH_CACHE_MAX_SIZE, AUTH_CACHE_TTL_SECONDS,
+    AUTH_JWT_VERIFY, AUTH_JWT_SECRET, AUTH_JWT_ALGORITHMS
+)
 from datetime import datetime, timezone
 
 
+@dataclass(frozen=True, slots=True)
+class AuthIdentity:
+    """Identity resolved from an access token, safe to keep outside a DB session."""
+    token_id: str | None  # None when verified locally from a JWT without a `jti` claim
+    expires_at: datetime
+    user_id: str | None = None
+    user_is_active: bool = False
+    agent_id: str | None = None
+    agent_is_active: bool = False
+
+    @classmethod
+    def from_token(cls, token: Token) -> "AuthIdentity":
+        """Build identity from a Token with its user/agent relationships loaded."""
+        user = token.user
+        agent = token.agent
+        return cls(
+            token_id=token.id,
+            expires_at=_as_utc(token.expires_at),
+            user_id=user.id if user else None,
+            user_is_active=bool(user and user.is_active),
+            agent_id=agent.id if agent else None,
+            agent_is_active=bool(agent and agent.is_active)
+        )
+
+
+# access_token -> AuthIdentity
+auth_cache = TTLCache(max_size=AUTH_CACHE_MAX_SIZE, ttl_seconds=AUTH_CACHE_TTL_SECONDS)
+
+
+def _as_utc(value: datetime) -> datetime:
+    """SQLite returns naive datetimes; stored values are always UTC."""
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+
+def _identity_from_jwt(token_string: str) -> AuthIdentity | None:
+    """
+    Verify a JWT locally against the shared signing key and the revocation list.
+
+    No query is made: a validly signed token is accepted until it expires
+    unless it's on the revocation list, even if its row was deleted.
+
+    Returns None when the database has to decide: not a JWT we can verify,
+    a `sub` that isn't a user or agent id, a possibly revoked token, or a
+    stale revocation list. Raises 401 for an expired signature.
+    """
+    if not revocation_list.fresh:
+        return None
+
+    try:
+        payload = jwt.decode(
+            token_string, AUTH_JWT_SECRET, algorithms=AUTH_JWT_ALGORITHMS,
+            options={"require": ["exp", "sub"]}
+        )
+    except jwt.ExpiredSignatureError:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid or expired token"
+        )
+    except jwt.InvalidTokenError:
+        return None
+
+    if revocation_list.is_token_revoked(token_string):
+        return None
+
+    # The main system signs tokens with the user or agent id as subject
+    subject = str(payload["sub"])
+    user_id = subject if subject.startswith("user_") else None
+    agent_id = subject if subject.startswith("agent_") else None
+    if not user_id and not agent_id:
+        return None
+
+    return AuthIdentity(
+        token_id=payload.get("jti"),
+        expires_at=datetime.fromtimestamp(payload["exp"], timezone.utc),
+        user_id=user_id,
+        user_is_active=bool(user_id) and not revocation_list.is_user_inactive(user_id),
+        agent_id=agent_id,
+        agent_is_active=bool(agent_id) and not revocation_list.is_agent_inactive(agent_id)
+    )
+
+
 async def get_auth_token(
     authorization: str = Header(),
-    db_session: Session = Depends(get_session)
-) -> Token:
-    """Extract and validate token from Authorization header, returning Token object with relationships loaded."""
+    db_session: DatabaseSession = Depends(get_session)
+) -> AuthIdentity:
+    """
+    Extract and validate token from Authorization header, returning the resolved identity.
+
+    Each user or agent is rate limited across all of its tokens; over the
+    limit this raises 429 with Retry-After.
+    """
 
     if not authorization.startswith("Bearer "):
         raise HTTPException(
@@ -19,9 +114,16 @@ async def get_auth_token(
         )
 
     token_string = authorization.split(" ")[1]
+    identity = await _resolve_identity(token_string, db_session)
+    # Routes run shared reads and streams on sessions of their own; don't hold this connection meanwhile
+    await db_session.release()
+    rate_limiter.check(identity.agent_id or identity.user_id or token_string)
+    return identity
 
-    # Single query with joins to load Token with User and Agent relationships
-    statement = (
+
+def token_statement(token_string: str, now: datetime):
+    """Single query with joins to load a live Token with its User and Agent relationships."""
+    return (
         select(Token)
         .options(
             joinedload(Token.token_users).joinedload(TokenUser.user),
@@ -30,11 +132,27 @@ async def get_auth_token(
         .where(
             Token.access_token == token_string,
             Token.is_revoked == False,
-            Token.expires_at > datetime.now(timezone.utc)
+            Token.expires_at > now
         )
     )
 
-    token = db_session.exec(statement).first()
+
+async def _resolve_identity(token_string: str, db_session: DatabaseSession) -> AuthIdentity:
+    now = datetime.now(timezone.utc)
+
+    if AUTH_CACHE_ENABLED:
+        identity = auth_cache.get(token_string)
+        if identity is not None:
+            if identity.expires_at > now:
+                return identity
+            auth_cache.pop(token_string)
+
+    if AUTH_JWT_VERIFY:
+        identity = _identity_from_jwt(token_string)
+        if identity is not None:
+            return identity
+
+    token = (await db_session.exec(token_statement(token_string, now))).first()
 
     if not token:
         raise HTTPException(
@@ -42,36 +160,60 @@ async def get_auth_token(
             detail="Invalid or expired token"
         )
 
-    return token
+    identity = AuthIdentity.from_token(token)
+
+    if AUTH_CACHE_ENABLED:
+        # Never keep an entry past the token's own expiry
+        auth_cache.set(token_string, identity, ttl_seconds=(identity.expires_at - now).total_seconds())
+
+    return identity
+
+
+def invalidate_token(access_token: str) -> bool:
+    """Drop a cached token, e.g. right after it is revoked."""
+    revocation_list.revoke_token(access_token)
+    return auth_cache.pop(access_token)
+
+
+def invalidate_user(user_id: str) -> int:
+    """Drop every cached token belonging to a user, e.g. after deactivation."""
+    revocation_list.deactivate_user(user_id)
+    return auth_cache.invalidate_where(lambda _, identity: identity.user_id == user_id)
+
+
+def invalidate_agent(agent_id: str) -> int:
+    """Drop every cached token belonging to an agent, e.g. after deactivation."""
+    revocation_list.deactivate_agent(agent_id)
+    return auth_cache.invalidate_where(lambda _, identity: identity.agent_id == agent_id)
 
 
-def get_user_from_token(token: Token, db_session: Session = None) -> User | None:
-    """Get user associated with a token (using preloaded relationship)."""
-    return token.user
+async def get_user_from_token(token: AuthIdentity, db_session: DatabaseSession) -> User | None:
+    """Get user associated with a resolved token identity."""
+    return await db_session.get(User, token.user_id) if token.user_id else None
 
 
 async def require_user_or_agent(
-    token: Token,
-    db_session: Session = None
+    token: AuthIdentity,
+    db_session: DatabaseSession = None
 ) -> None:
     """Validate that the token is associated with either a user or an agent. Raises 403 if neither."""
 
     # Token must be associated with either a user or agent
-    if not token.user and not token.agent:
+    if not token.user_id and not token.agent_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Valid user or agent authentication required"
         )
 
     # If it's a user, they must be active
-    if token.user and not token.user.is_active:
+    if token.user_id and not token.user_is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="User account is inactive"
         )
 
     # If it's an agent, they must be active
-    if token.agent and not token.agent.is_active:
+    if token.agent_id and not token.agent_is_active:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Agent is inactive"
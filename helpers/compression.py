@@ -0,0 +1,191 @@
+import asyncio
+import zlib
+import brotli
+from starlette.datastructures import Headers, MutableHeaders
+from settings import COMPRESSION_MIN_BYTES, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY
+
+# Server preference when the client accepts several encodings equally
+ENCODINGS = ("br", "gzip")
+
+# Event streams must reach the client as soon as each event is written
+UNCOMPRESSED_MEDIA_TYPES = ("text/event-stream",)
+
+# Bodies this large are compressed in a worker thread (zlib and brotli release the GIL)
+THREAD_MIN_BYTES = 256 * 1024
+
+
+def encoded_etag(etag: str, encoding: str) -> str:
+    """
+    ETag of the encoded representation: "abc" -> "abc-br".
+
+    A strong validator must differ per content-coding (RFC 9110 8.8.3);
+    `decoded_etags` undoes this for the validators clients send back.
+    """
+    return etag[:-1] + f'-{encoding}"' if etag.endswith('"') else etag
+
+
+def decoded_etags(header: str) -> tuple[str, dict[str, str]]:
+    """An If-None-Match/If-Match header with coding suffixes removed, and each stripped tag -> the tag sent."""
+    tags, sent = [], {}
+    for tag in (tag.strip() for tag in header.split(",")):
+        for encoding in ENCODINGS:
+            suffix = f'-{encoding}"'
+            if tag.endswith(suffix):
+                stripped = tag[:-len(suffix)] + '"'
+                sent[stripped.removeprefix("W/")] = tag.removeprefix("W/")
+                tag = stripped
+                break
+        tags.append(tag)
+    return ", ".join(tags), sent
+
+
+def negotiate_encoding(accept_encoding: str | None) -> str | None:
+    """Pick br or gzip from an Accept-Encoding header by q-value, or None."""
+    if not accept_encoding:
+        return None
+
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    wildcard = weights.get("*", 0.0)
+    best = max(ENCODINGS, key=lambda encoding: (weights.get(encoding, wildcard), -ENCODINGS.index(encoding)))
+    return best if weights.get(best, wildcard) > 0 else None
+
+
+class _Compressor:
+    """Incremental br/gzip encoder; every chunk is flushed so streamed lines aren't held back."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)  # 31: gzip container
+
+    def chunk(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush()
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli or gzip, as the client prefers.
+
+    Bodies sent in one piece are compressed only from `minimum_size` bytes;
+    streamed bodies (NDJSON, exports) are always compressed, chunk by chunk.
+    Responses that already carry a Content-Encoding, and Server-Sent Events,
+    pass through untouched.
+
+    A compressed response's ETag gets the coding as suffix (encoded_etag).
+    Suffixes are stripped from If-None-Match/If-Match before the route sees
+    them, and a 304 echoes the tag the client sent.
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        scope, sent_etags = _decode_conditional_headers(scope)
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None and not sent_etags:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor: _Compressor | None = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                etag = headers.get("etag", "")
+                opaque = etag.removeprefix("W/")
+                if message["status"] == 304 and opaque in sent_etags:
+                    MutableHeaders(raw=message["headers"])["ETag"] = etag[:-len(opaque)] + sent_etags[opaque]
+                media_type = headers.get("content-type", "")
+                passthrough = (
+                    encoding is None or "content-encoding" in headers or media_type.startswith(UNCOMPRESSED_MEDIA_TYPES)
+                )
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether compressing pays off
+                    start_message = message
+                return
+
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                if not more_body and len(body) < self.minimum_size:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+
+                compressor = _Compressor(encoding)
+                headers = MutableHeaders(raw=start_message["headers"])
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                if "etag" in headers:
+                    headers["ETag"] = encoded_etag(headers["etag"], encoding)
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    if len(body) >= THREAD_MIN_BYTES:
+                        body = await asyncio.to_thread(compressor.finish, body)
+                    else:
+                        body = compressor.finish(body)
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+
+            if more_body:
+                await send({"type": "http.response.body", "body": compressor.chunk(body), "more_body": True})
+            else:
+                await send({"type": "http.response.body", "body": compressor.finish(body)})
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _decode_conditional_headers(scope) -> tuple[dict, dict[str, str]]:
+    """The scope with coding suffixes removed from If-None-Match/If-Match, and the tags the client sent."""
+    sent_etags: dict[str, str] = {}
+    headers = []
+    for name, value in scope["headers"]:
+        if name in (b"if-none-match", b"if-match"):
+            decoded, sent = decoded_etags(value.decode("latin-1"))
+            sent_etags.update(sent)
+            value = decoded.encode("latin-1")
+        headers.append((name, value))
+    if not sent_etags:
+        return scope, sent_etags
+    return {**scope, "headers": headers}, sent_etags
@@ -0,0 +1,84 @@
+from collections import defaultdict
+from typing import Iterable
+from helpers.schedule import MINUTES_PER_DAY, WEEKDAYS, Shift, find_overlaps, format_minute
+
+
+def schedule_conflicts(
+    staff_shifts: Iterable[tuple[str, list[Shift]]],
+    capacity: int = 1,
+    role: str | None = None
+) -> list[dict]:
+    """
+    Conflicts across the weekly schedules of many staff members.
+
+    "overlap": one person has overlapping shifts (stored before write-time
+    validation existed). "role": more than `capacity` people hold the same
+    role at once, found with one sweep line per role over the whole week.
+    Pass `role` to check only that role.
+    """
+    conflicts = []
+    role_intervals: dict[str, list[tuple[int, int, str]]] = defaultdict(list)
+
+    for staff_id, shifts in staff_shifts:
+        for first, second in find_overlaps(shifts):
+            start = second.weekday * MINUTES_PER_DAY + second.start_minute
+            end = second.weekday * MINUTES_PER_DAY + min(first.end_minute, second.end_minute)
+            conflicts.append(_conflict("overlap", None, start, end, [staff_id]))
+        for shift in shifts:
+            if shift.role and (role is None or shift.role == role):
+                offset = shift.weekday * MINUTES_PER_DAY
+                role_intervals[shift.role].append((offset + shift.start_minute, offset + shift.end_minute, staff_id))
+
+    for role_name in sorted(role_intervals):
+        conflicts.extend(_role_conflicts(role_name, role_intervals[role_name], capacity))
+
+    return conflicts
+
+
+def _role_conflicts(role: str, intervals: list[tuple[int, int, str]], capacity: int) -> list[dict]:
+    """Sweep start/end events in time order, tracking who holds the role."""
+    # At equal times ends (0) sort before starts (1), so back-to-back shifts don't conflict
+    events = sorted(
+        [(start, 1, staff_id) for start, _, staff_id in intervals]
+        + [(end, 0, staff_id) for _, end, staff_id in intervals]
+    )
+
+    conflicts = []
+    holders: dict[str, int] = {}  # staff_id -> open intervals (a person may have adjacent pieces)
+    open_since: int | None = None
+    open_holders: frozenset = frozenset()
+
+    i = 0
+    while i < len(events):
+        moment = events[i][0]
+        while i < len(events) and events[i][0] == moment:
+            _, is_start, staff_id = events[i]
+            if is_start:
+                holders[staff_id] = holders.get(staff_id, 0) + 1
+            elif holders[staff_id] == 1:
+                del holders[staff_id]
+            else:
+                holders[staff_id] -= 1
+            i += 1
+
+        current = frozenset(holders)
+        if open_since is not None and current != open_holders:
+            conflicts.append(_conflict("role", role, open_since, moment, sorted(open_holders)))
+            open_since = None
+        if open_since is None and len(current) > capacity:
+            open_since, open_holders = moment, current
+
+    return conflicts
+
+
+def _conflict(kind: str, role: str | None, start: int, end: int, staff_ids: list[str]) -> dict:
+    """start/end are minutes since Monday 00:00."""
+    return {
+        "kind": kind,
+        "role": role,
+        "start_weekday": WEEKDAYS[start // MINUTES_PER_DAY],
+        "start": format_minute(start % MINUTES_PER_DAY),
+        "end_weekday": WEEKDAYS[(end - 1) // MINUTES_PER_DAY],
+        "end": format_minute((end - 1) % MINUTES_PER_DAY + 1),
+        "staff_ids": staff_ids,
+    }
@@ -0,0 +1,131 @@
+from typing import Iterable, TYPE_CHECKING
+import numpy as np
+from helpers.schedule import MINUTES_PER_DAY, MINUTES_PER_WEEK, WEEKDAYS, Shift, format_minute
+
+if TYPE_CHECKING:
+    from helpers.shift_index import ShiftIndex
+
+
+def compile_minute_counts(staff_shifts: Iterable[list[Shift]]) -> np.ndarray:
+    """
+    Headcount for every minute of the week as a (7, 1440) int32 array.
+
+    Each staff member's shifts are merged first so overlapping shifts of the
+    same person count once. Both the merge and the counts run in numpy: the
+    shifts are sorted per person, a running maximum of their ends marks where
+    merged intervals begin, and the counts come from a difference array and a
+    single cumulative sum.
+    """
+    shift_lists = list(staff_shifts)
+    shifts_per_staff = np.fromiter(map(len, shift_lists), dtype=np.int64, count=len(shift_lists))
+    minutes = np.array(
+        [(shift.weekday, shift.start_minute, shift.end_minute) for shifts in shift_lists for shift in shifts],
+        dtype=np.int64
+    ).reshape(-1, 3)
+
+    diff = np.zeros(MINUTES_PER_WEEK + 1, dtype=np.int32)
+    if len(minutes):
+        # Shift each person onto a week of their own so merged intervals never span two people
+        span = MINUTES_PER_WEEK + 1
+        offsets = np.repeat(np.arange(len(shift_lists), dtype=np.int64) * span, shifts_per_staff)
+        starts = offsets + minutes[:, 0] * MINUTES_PER_DAY + minutes[:, 1]
+        ends = offsets + minutes[:, 0] * MINUTES_PER_DAY + minutes[:, 2]
+        order = np.argsort(starts, kind="stable")
+        starts, ends = starts[order], ends[order]
+
+        # A merged interval begins at a shift starting after every earlier one has ended
+        reach = np.maximum.accumulate(ends)
+        begins = np.flatnonzero(np.concatenate(([True], starts[1:] > reach[:-1])))
+        last = np.append(begins[1:] - 1, len(starts) - 1)
+        np.add.at(diff, starts[begins] % span, 1)
+        np.add.at(diff, reach[last] % span, -1)
+
+    return np.cumsum(diff[:-1], dtype=np.int32).reshape(7, MINUTES_PER_DAY)
+
+
+def coverage_report(minute_counts: np.ndarray, slot_minutes: int, required_staff: int) -> dict:
+    """
+    Summarize a minute headcount matrix into slots and under-staffed gaps.
+
+    A slot's headcount is the minimum over its minutes, i.e. the staff
+    present for the whole slot. Gaps are maximal runs of slots (wrapping from
+    Sunday into Monday) whose headcount is below `required_staff`.
+    """
+    if MINUTES_PER_DAY % slot_minutes:
+        raise ValueError("slot_minutes must divide 1440")
+
+    slots_per_day = MINUTES_PER_DAY // slot_minutes
+    slots = minute_counts.reshape(7, slots_per_day, slot_minutes).min(axis=2)
+    day_min = minute_counts.min(axis=1)
+    day_max = minute_counts.max(axis=1)
+
+    days = [
+        {
+            "weekday": WEEKDAYS[day],
+            "headcount": slots[day].tolist(),
+            "min_headcount": int(day_min[day]),
+            "max_headcount": int(day_max[day]),
+        }
+        for day in range(7)
+    ]
+
+    return {
+        "slot_minutes": slot_minutes,
+        "required_staff": required_staff,
+        "days": days,
+        "gaps": _gaps(slots.ravel(), slot_minutes, required_staff),
+    }
+
+
+def _gaps(week_slots: np.ndarray, slot_minutes: int, required_staff: int) -> list[dict]:
+    under = week_slots < required_staff
+    if not under.any():
+        return []
+
+    total = len(week_slots)
+    if under.all():
+        return [_gap(0, total, week_slots, slot_minutes)]
+
+    # Run boundaries: +1 where a gap starts, -1 where it ends
+    edges = np.diff(np.concatenate(([0], under.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    runs = list(zip(starts.tolist(), ends.tolist()))
+    if len(runs) > 1 and runs[0][0] == 0 and runs[-1][1] == total:
+        # The week wraps: a gap ending Monday 00:00 continues the one ending Sunday 24:00
+        runs[0] = (runs[-1][0], runs[0][1] + total)
+        runs.pop()
+
+    return [_gap(start, end, week_slots, slot_minutes) for start, end in sorted(runs)]
+
+
+def _gap(start: int, end: int, week_slots: np.ndarray, slot_minutes: int) -> dict:
+    total = len(week_slots)
+    indexes = np.arange(start, end) % total
+    start_minute = start * slot_minutes
+    end_minute = end * slot_minutes
+    return {
+        "start_weekday": WEEKDAYS[(start_minute // MINUTES_PER_DAY) % 7],
+        "start": format_minute(start_minute % MINUTES_PER_DAY),
+        "end_weekday": WEEKDAYS[((end_minute - 1) // MINUTES_PER_DAY) % 7],
+        "end": format_minute((end_minute - 1) % MINUTES_PER_DAY + 1),
+        "headcount": int(week_slots[indexes].min()),
+    }
+
+
+class CoverageCache:
+    """Keeps the compiled minute matrix until the shift index version changes."""
+
+    def __init__(self):
+        self._version: int | None = None
+        self._minute_counts: np.ndarray | None = None
+
+    def minute_counts(self, index: "ShiftIndex") -> np.ndarray:
+        if self._minute_counts is None or index.version != self._version:
+            self._minute_counts = compile_minute_counts(index.active_shifts())
+            self._version = index.version
+        return self._minute_counts
+
+
+coverage_cache = CoverageCache()
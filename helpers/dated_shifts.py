@@ -0,0 +1,100 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Iterator, NamedTuple
+from helpers.cache import TTLCache
+from helpers.schedule import MINUTES_PER_DAY, Shift, parse_schedule, schedule_time_to_utc, to_schedule_time
+from settings import SHIFT_CACHE_MAX_SIZE, SHIFT_CACHE_TTL_SECONDS
+
+# Expansion of the weekly template in Staff.schedule into concrete, dated shifts.
+# Shift times are wall-clock times in SCHEDULE_TIMEZONE, so across a DST change
+# a 09:00-17:00 shift still starts at 09:00 local; its UTC offset moves instead.
+# Local times skipped by a spring-forward jump resolve to the later offset
+# (02:30 becomes 03:30); repeated fall-back times take the first occurrence.
+
+
+class DatedShift(NamedTuple):
+    """A concrete shift. Aware UTC datetimes, end exclusive."""
+    start: datetime
+    end: datetime
+    role: str
+
+
+def weekly_shifts(shifts: list[Shift]) -> dict[int, list[tuple[int, int, str]]]:
+    """
+    (start_minute, duration_minutes, role) per weekday.
+
+    parse_schedule splits overnight shifts at midnight; the two halves are
+    joined back here so 22:00-06:00 materializes as one shift.
+    """
+    after_midnight = {shift.weekday: shift for shift in shifts if shift.start_minute == 0}
+    # Only partial-day pieces are folded in, so 24/7 schedules don't chain around the week
+    continues = {
+        shift: after_midnight[(shift.weekday + 1) % 7]
+        for shift in shifts
+        if shift.end_minute == MINUTES_PER_DAY and shift.start_minute > 0
+        and (shift.weekday + 1) % 7 in after_midnight
+        and after_midnight[(shift.weekday + 1) % 7].role == shift.role
+        and after_midnight[(shift.weekday + 1) % 7].end_minute < MINUTES_PER_DAY
+    }
+    folded = set(continues.values())
+
+    weekly: dict[int, list[tuple[int, int, str]]] = defaultdict(list)
+    for shift in sorted(shifts):
+        if shift in folded:
+            continue
+        duration = shift.end_minute - shift.start_minute
+        if shift in continues:
+            duration += continues[shift].end_minute
+        weekly[shift.weekday].append((shift.start_minute, duration, shift.role))
+    return weekly
+
+
+def materialize_shifts(shifts: list[Shift], start: datetime, end: datetime) -> Iterator[DatedShift]:
+    """Yield the dated shifts overlapping [start, end), in start order."""
+    start_utc, end_utc = schedule_time_to_utc(start), schedule_time_to_utc(end)
+    weekly = weekly_shifts(shifts)
+    if not weekly:
+        return
+
+    # Start a day early: an overnight shift from the day before may reach into the range
+    day: date = to_schedule_time(start_utc).date() - timedelta(days=1)
+    last_day: date = to_schedule_time(end_utc).date()
+    while day <= last_day:
+        midnight = datetime.combine(day, time())
+        for start_minute, duration, role in weekly.get(day.weekday(), ()):
+            local_start = midnight + timedelta(minutes=start_minute)
+            shift_start = schedule_time_to_utc(local_start)
+            shift_end = schedule_time_to_utc(local_start + timedelta(minutes=duration))
+            if shift_start < end_utc and shift_end > start_utc:
+                yield DatedShift(shift_start, shift_end, role)
+        day += timedelta(days=1)
+
+
+class DatedShiftCache:
+    """
+    Memoizes each staff member's expansion by (staff_id, updated_at, range).
+
+    A schedule change bumps updated_at, so stale entries are never hit and
+    simply age out of the LRU.
+    """
+
+    def __init__(self, max_size: int = SHIFT_CACHE_MAX_SIZE, ttl_seconds: float = SHIFT_CACHE_TTL_SECONDS):
+        self.cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def shifts(
+        self,
+        staff_id: str,
+        updated_at: datetime,
+        schedule: str,
+        start: datetime,
+        end: datetime
+    ) -> tuple[DatedShift, ...]:
+        key = (staff_id, updated_at, start, end)
+        dated = self.cache.get(key)
+        if dated is None:
+            dated = tuple(materialize_shifts(parse_schedule(schedule), start, end))
+            self.cache.set(key, dated)
+        return dated
+
+
+dated_shift_cache = DatedShiftCache()
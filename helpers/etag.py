@@ -0,0 +1,36 @@
+import hashlib
+from models.staff_models import Staff
+from helpers.staff_events import naive_utc
+
+
+def make_etag(*parts) -> str:
+    """Strong ETag from the given parts."""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def staff_etag(staff: Staff, fields: tuple[str, ...] | None = None) -> str:
+    """ETag of a single staff row; changes whenever updated_at does. Projections get their own tag."""
+    if fields is None:
+        return make_etag(staff.id, naive_utc(staff.updated_at).isoformat())
+    return make_etag(staff.id, naive_utc(staff.updated_at).isoformat(), *fields)
+
+
+def _tags(header: str) -> list[str]:
+    return [tag.strip() for tag in header.split(",") if tag.strip()]
+
+
+def matches_if_none_match(header: str | None, etag: str) -> bool:
+    """True if an If-None-Match header matches etag (weak comparison), i.e. 304 applies."""
+    if not header:
+        return False
+    tags = _tags(header)
+    return "*" in tags or etag in (tag.removeprefix("W/") for tag in tags)
+
+
+def matches_if_match(header: str | None, etag: str) -> bool:
+    """True if an If-Match header allows the write (strong comparison). A missing header allows it."""
+    if header is None:
+        return True
+    tags = _tags(header)
+    return "*" in tags or etag in tags
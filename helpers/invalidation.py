@@ -0,0 +1,218 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from select import select as wait_readable
+from sqlalchemy import func, select
+from database import engine, open_session
+from models.staff_models import Staff
+from helpers.staff_events import StaffChange, staff_events
+from settings import INVALIDATION_BACKEND, INVALIDATION_CHANNEL, INVALIDATION_SOCKET_DIR, logger
+
+# Wait before reconnecting a bus whose connection or socket failed
+RECONNECT_SECONDS = 1.0
+# How often the Postgres listener thread checks whether it should stop
+LISTEN_POLL_SECONDS = 1.0
+
+
+class InvalidationBus(ABC):
+    """
+    Relays staff changes committed by this worker to every other worker.
+
+    Messages carry only the staff id (null for bulk writes). A receiver
+    re-reads the row from the primary and publishes it on its own
+    staff_events, so its caches, indexes, snapshot and SSE streams see the
+    write without waiting for their next poll. Changes received from the bus
+    aren't sent on again. After a reconnect every listener is told to
+    resync, in case messages were missed meanwhile.
+
+    Subclasses implement `_send(payload)` and `_listen()`, which receives
+    until the connection fails or the task is cancelled.
+    """
+
+    def __init__(self):
+        self.sent = 0
+        self.received = 0
+        self.errors = 0
+        # Set in run(), i.e. in the worker: a preloaded app is imported before the fork
+        self._origin: str | None = None
+        self._relaying = False
+        self._tasks: set[asyncio.Task] = set()
+
+    def on_change(self, change: StaffChange | None) -> None:
+        """staff_events listener: send a local change to the other workers."""
+        if self._relaying or self._origin is None:
+            return
+        payload = json.dumps({"origin": self._origin, "id": change.staff.id if change else None})
+        self._spawn(self._deliver(payload))
+
+    async def _deliver(self, payload: str) -> None:
+        try:
+            await self._send(payload)
+            self.sent += 1
+        except Exception:
+            self.errors += 1
+            logger.exception("Invalidation send failed")
+
+    def _received(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            self.errors += 1
+            return
+        if message.get("origin") == self._origin:
+            return
+        self.received += 1
+        self._spawn(self._apply(message.get("id")))
+
+    async def _apply(self, staff_id: str | None) -> None:
+        staff = None
+        if staff_id is not None:
+            try:
+                async with open_session() as db_session:
+                    staff = await db_session.get(Staff, staff_id)
+            except Exception:
+                self.errors += 1
+                logger.exception("Invalidation reload failed")
+        self._publish_local(staff)
+
+    def _publish_local(self, staff: Staff | None) -> None:
+        self._relaying = True
+        try:
+            staff_events.publish(staff)
+        finally:
+            self._relaying = False
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.get_running_loop().create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def run(self) -> None:
+        """Receive forever, reconnecting on failure; started by the app lifespan."""
+        self._origin = f"{socket.gethostname()}:{os.getpid()}"
+        while True:
+            try:
+                await self._listen()
+            except Exception:
+                self.errors += 1
+                logger.exception("Invalidation bus disconnected")
+            await asyncio.sleep(RECONNECT_SECONDS)
+            self._publish_local(None)
+
+    @abstractmethod
+    async def _send(self, payload: str) -> None:
+        """Deliver payload to every other worker."""
+
+    @abstractmethod
+    async def _listen(self) -> None:
+        """Pass each payload received to `_received` until the connection fails or the task is cancelled."""
+
+    def stats(self) -> dict:
+        return {"sent": self.sent, "received": self.received, "errors": self.errors}
+
+
+class PostgresInvalidationBus(InvalidationBus):
+    """LISTEN/NOTIFY on one channel; reaches every worker in every container using the database."""
+
+    def __init__(self, channel: str = INVALIDATION_CHANNEL):
+        super().__init__()
+        self.channel = channel
+
+    async def _send(self, payload: str) -> None:
+        await asyncio.to_thread(self._notify, payload)
+
+    def _notify(self, payload: str) -> None:
+        with engine.begin() as connection:
+            connection.execute(select(func.pg_notify(self.channel, payload)))
+
+    async def _listen(self) -> None:
+        # psycopg2 blocks, so the connection lives in a thread that hands notifications to the loop
+        stop = threading.Event()
+        try:
+            await asyncio.to_thread(self._listen_blocking, asyncio.get_running_loop(), stop)
+        finally:
+            stop.set()
+
+    def _listen_blocking(self, loop: asyncio.AbstractEventLoop, stop: threading.Event) -> None:
+        # A connection of its own, detached so it doesn't hold a pool slot forever
+        pooled = engine.raw_connection()
+        pooled.detach()
+        connection = pooled.driver_connection
+        try:
+            connection.rollback()
+            connection.autocommit = True
+            with connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while not stop.is_set():
+                readable, _, _ = wait_readable([connection], [], [], LISTEN_POLL_SECONDS)
+                if not readable:
+                    continue
+                connection.poll()
+                while connection.notifies:
+                    loop.call_soon_threadsafe(self._received, connection.notifies.pop(0).payload)
+        finally:
+            connection.close()
+
+
+class UnixSocketInvalidationBus(InvalidationBus):
+    """
+    Datagrams between workers on one host, for development, tests and
+    SQLite deployments: each worker binds `<socket_dir>/<pid>.sock` and sends
+    to every other socket in the directory.
+    """
+
+    def __init__(self, socket_dir: str = INVALIDATION_SOCKET_DIR):
+        super().__init__()
+        self.socket_dir = Path(socket_dir)
+        self._path: Path | None = None
+        self._socket: socket.socket | None = None
+
+    async def _send(self, payload: str) -> None:
+        if self._socket is None:
+            return
+        data = payload.encode()
+        for path in self.socket_dir.glob("*.sock"):
+            if path == self._path:
+                continue
+            try:
+                self._socket.sendto(data, str(path))
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Left behind by a worker that exited
+                path.unlink(missing_ok=True)
+            except BlockingIOError:
+                # That worker's receive buffer is full; its caches catch up on their next poll
+                self.errors += 1
+
+    async def _listen(self) -> None:
+        self.socket_dir.mkdir(parents=True, exist_ok=True)
+        self._path = self.socket_dir / f"{os.getpid()}.sock"
+        self._path.unlink(missing_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        loop = asyncio.get_running_loop()
+        try:
+            sock.bind(str(self._path))
+            self._socket = sock
+            while True:
+                self._received((await loop.sock_recv(sock, 65536)).decode())
+        finally:
+            self._socket = None
+            sock.close()
+            self._path.unlink(missing_ok=True)
+
+
+def _create_bus() -> InvalidationBus | None:
+    if INVALIDATION_BACKEND == "postgres":
+        return PostgresInvalidationBus()
+    if INVALIDATION_BACKEND == "unix":
+        return UnixSocketInvalidationBus()
+    return None
+
+
+invalidation_bus = _create_bus()
+if invalidation_bus is not None:
+    staff_events.add_listener(invalidation_bus.on_change)
@@ -0,0 +1,266 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Callable, Iterable
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from settings import SLOW_REQUEST_SECONDS, logger
+
+# Minimal Prometheus text-format metrics (no client library needed).
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+# Every metric registers itself here on creation
+registry: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values)) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def inc(self, *label_values, amount: float = 1) -> None:
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = LATENCY_BUCKETS
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [bucket counts..., sum, count]
+        self._series: dict[tuple, list[float]] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def observe(self, value: float, *label_values) -> None:
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        label_names = self.labels + ("le",)
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                for bound, count in zip(self.buckets, series):
+                    yield f"{self.name}_bucket{_format_labels(label_names, label_values + (bound,))} {count}"
+                yield f"{self.name}_bucket{_format_labels(label_names, label_values + ('+Inf',))} {series[-1]}"
+                labels = _format_labels(self.labels, label_values)
+                yield f"{self.name}_sum{labels} {series[-2]}"
+                yield f"{self.name}_count{labels} {series[-1]}"
+
+
+class GaugeCallback:
+    """Gauge whose samples are read from a callback at scrape time."""
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        callback: Callable[[], Iterable[tuple[tuple, float]]],
+        labels: tuple[str, ...] = ()
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.callback = callback
+        registry.append(self)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} gauge"
+        for label_values, value in self.callback():
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {value}"
+
+
+def render_metrics() -> str:
+    """All registered metrics in Prometheus text exposition format."""
+    lines = []
+    for metric in registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+request_latency = Histogram(
+    "staff_http_request_duration_seconds", "HTTP request latency by route",
+    labels=("method", "route", "status")
+)
+request_sql_statements = Histogram(
+    "staff_http_request_sql_statements", "SQL statements executed per request",
+    labels=("method", "route"), buckets=COUNT_BUCKETS
+)
+request_sql_seconds = Histogram(
+    "staff_http_request_sql_seconds", "Time spent in SQL per request",
+    labels=("method", "route")
+)
+sql_statements = Counter("staff_sql_statements_total", "SQL statements executed", labels=("engine",))
+pool_wait_seconds = Histogram(
+    "staff_db_pool_wait_seconds", "Time waiting to check out a pooled connection", labels=("engine",)
+)
+pool_timeouts = Counter("staff_db_pool_timeouts_total", "Connection checkouts that timed out", labels=("engine",))
+
+
+class RequestStats:
+    """SQL activity of the current request."""
+    __slots__ = ("sql_count", "sql_seconds", "statements")
+
+    # Statements kept per request for the slow-request log
+    MAX_STATEMENTS = 20
+
+    def __init__(self):
+        self.sql_count = 0
+        self.sql_seconds = 0.0
+        self.statements: list[tuple[float, str]] = []
+
+
+current_request_stats: ContextVar[RequestStats | None] = ContextVar("current_request_stats", default=None)
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Count and time every statement executed on a (sync) engine."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_started"].pop()
+        sql_statements.inc(name)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.sql_count += 1
+            stats.sql_seconds += elapsed
+            if len(stats.statements) < RequestStats.MAX_STATEMENTS:
+                stats.statements.append((elapsed, " ".join(statement.split())[:200]))
+
+
+def _timed_pool_class(base: type, name: str) -> type:
+    """Subclass a queue pool so checkout wait time and timeouts are recorded."""
+    class TimedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            except PoolTimeoutError:
+                pool_timeouts.inc(name)
+                raise
+            finally:
+                pool_wait_seconds.observe(time.perf_counter() - started, name)
+
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    return TimedPool
+
+
+def timed_queue_pool(name: str) -> type:
+    return _timed_pool_class(QueuePool, name)
+
+
+def timed_async_queue_pool(name: str) -> type:
+    return _timed_pool_class(AsyncAdaptedQueuePool, name)
+
+
+def register_pool_gauges(engines: Callable[[], dict[str, Engine]]) -> None:
+    """Expose size/checked-out/overflow of each engine's pool at scrape time."""
+
+    def samples(method: str):
+        def callback():
+            for name, engine in engines().items():
+                pool = engine.pool
+                if hasattr(pool, method):
+                    yield (name,), getattr(pool, method)()
+        return callback
+
+    GaugeCallback("staff_db_pool_size", "Configured pool size", samples("size"), labels=("engine",))
+    GaugeCallback("staff_db_pool_checked_out", "Connections currently checked out", samples("checkedout"), labels=("engine",))
+    GaugeCallback("staff_db_pool_overflow", "Connections open beyond pool_size", samples("overflow"), labels=("engine",))
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording per-route latency and per-request SQL counts.
+
+    Requests slower than SLOW_REQUEST_SECONDS are logged with their SQL
+    breakdown (set it to 0 to disable the log).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = current_request_stats.set(stats)
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            current_request_stats.reset(token)
+
+            # The router stores the matched route on the scope; use its template to bound cardinality
+            route = scope.get("route")
+            route_path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+
+            request_latency.observe(elapsed, method, route_path, status_code)
+            request_sql_statements.observe(stats.sql_count, method, route_path)
+            request_sql_seconds.observe(stats.sql_seconds, method, route_path)
+
+            if SLOW_REQUEST_SECONDS and elapsed >= SLOW_REQUEST_SECONDS:
+                breakdown = "; ".join(f"{seconds * 1000:.1f}ms {sql}" for seconds, sql in stats.statements)
+                logger.warning(
+                    f"Slow request {method} {scope['path']} -> {status_code} in {elapsed * 1000:.1f}ms "
+                    f"({stats.sql_count} SQL statements, {stats.sql_seconds * 1000:.1f}ms in SQL): {breakdown}"
+                )
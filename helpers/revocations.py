@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import time
+from datetime import datetime, timezone
+from sqlmodel import select
+from database import DatabaseSession, open_session
+from models.auth import Agent, Token, User
+from settings import AUTH_REVOCATION_REFRESH_SECONDS, logger
+
+# Newly revoked tokens fetched per query, well under SQLite's bound-parameter limit
+FETCH_BATCH_SIZE = 500
+
+
+def _digest(access_token: str) -> bytes:
+    return hashlib.blake2b(access_token.encode(), digest_size=8).digest()
+
+
+class RevocationList:
+    """
+    In-memory snapshot of revoked tokens and deactivated users/agents.
+
+    Used by local JWT verification instead of the joined token lookup.
+    Tokens are kept as 8-byte digests, and only revoked tokens that haven't
+    expired yet are loaded, so the set stays small. A digest collision only
+    sends that request to the database. A snapshot older than three refresh
+    intervals (e.g. the database is unreachable) counts as stale, and
+    callers fall back to the database.
+
+    The auth tables belong to the main system and record no change times,
+    so refreshes are incremental by key: each one reads the ids of revoked
+    tokens, drops those that expired or were reinstated, and fetches access
+    tokens only for newly revoked ids.
+    """
+
+    def __init__(self, refresh_seconds: float = AUTH_REVOCATION_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._tokens: set[bytes] = set()
+        # Revoked token id -> digest, from the last refresh
+        self._token_digests: dict[str, bytes] = {}
+        self._users: set[str] = set()
+        self._agents: set[str] = set()
+        self._loaded_at: float | None = None
+        self.tokens_fetched = 0
+
+    @property
+    def fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < 3 * self.refresh_seconds
+
+    def is_token_revoked(self, access_token: str) -> bool:
+        return _digest(access_token) in self._tokens
+
+    def is_user_inactive(self, user_id: str) -> bool:
+        return user_id in self._users
+
+    def is_agent_inactive(self, agent_id: str) -> bool:
+        return agent_id in self._agents
+
+    def revoke_token(self, access_token: str) -> None:
+        """Apply a revocation locally without waiting for the next refresh."""
+        self._tokens.add(_digest(access_token))
+
+    def deactivate_user(self, user_id: str) -> None:
+        self._users.add(user_id)
+
+    def deactivate_agent(self, agent_id: str) -> None:
+        self._agents.add(agent_id)
+
+    async def refresh(self, db_session: DatabaseSession) -> None:
+        now = datetime.now(timezone.utc)
+        revoked = (Token.is_revoked == True, Token.expires_at > now)
+        if self._loaded_at is None:
+            rows = (await db_session.exec(select(Token.id, Token.access_token).where(*revoked))).all()
+            token_digests = {token_id: _digest(access_token) for token_id, access_token in rows}
+            self.tokens_fetched += len(rows)
+        else:
+            token_ids = set((await db_session.exec(select(Token.id).where(*revoked))).all())
+            token_digests = {
+                token_id: digest for token_id, digest in self._token_digests.items() if token_id in token_ids
+            }
+            added = sorted(token_ids.difference(token_digests))
+            for start in range(0, len(added), FETCH_BATCH_SIZE):
+                batch = added[start:start + FETCH_BATCH_SIZE]
+                rows = (await db_session.exec(select(Token.id, Token.access_token).where(Token.id.in_(batch)))).all()
+                token_digests.update((token_id, _digest(access_token)) for token_id, access_token in rows)
+                self.tokens_fetched += len(rows)
+        users = (await db_session.exec(select(User.id).where(User.is_active == False))).all()
+        agents = (await db_session.exec(select(Agent.id).where(Agent.is_active == False))).all()
+
+        # Swap whole sets so lookups never see a half-built snapshot
+        self._token_digests = token_digests
+        self._tokens = set(token_digests.values())
+        self._users = set(users)
+        self._agents = set(agents)
+        self._loaded_at = time.monotonic()
+
+    async def run(self) -> None:
+        """Refresh forever; started by the app lifespan when AUTH_JWT_VERIFY is on."""
+        while True:
+            try:
+                # Revocations must not lag behind a replica, so read the primary
+                async with open_session() as db_session:
+                    await self.refresh(db_session)
+            except Exception:
+                logger.exception("Revocation list refresh failed")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "revoked_tokens": len(self._tokens),
+            "inactive_users": len(self._users),
+            "inactive_agents": len(self._agents),
+            "tokens_fetched": self.tokens_fetched,
+            "age_seconds": time.monotonic() - self._loaded_at if self._loaded_at is not None else -1,
+        }
+
+
+revocation_list = RevocationList()
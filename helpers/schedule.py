@@ -0,0 +1,219 @@
+import json
+from datetime import datetime, timedelta, timezone
+from typing import Any, NamedTuple
+from zoneinfo import ZoneInfo
+from settings import SCHEDULE_TIMEZONE
+
+# Staff.schedule format (weekly template, times in SCHEDULE_TIMEZONE):
+#   {"monday": [{"start": "09:00", "end": "17:00"}, ...], "tuesday": [...], ...}
+# Shifts ending at or before their start run overnight into the next day.
+# A shift may name a "role"; GET /staff/conflicts reports roles held by too many people at once.
+
+MINUTES_PER_DAY = 24 * 60
+MINUTES_PER_WEEK = 7 * MINUTES_PER_DAY
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+WEEKDAY_ALIASES = {
+    **{name: i for i, name in enumerate(WEEKDAYS)},
+    **{name[:3]: i for i, name in enumerate(WEEKDAYS)},
+    **{str(i): i for i in range(7)},
+    # Spanish keys used by the POS system
+    "lunes": 0, "martes": 1, "miercoles": 2, "miércoles": 2, "jueves": 3,
+    "viernes": 4, "sabado": 5, "sábado": 5, "domingo": 6,
+}
+
+schedule_timezone = ZoneInfo(SCHEDULE_TIMEZONE)
+
+
+class ScheduleError(ValueError):
+    """Raised when a schedule cannot be parsed."""
+
+
+class Window(NamedTuple):
+    """A time window inside one weekday, in minutes since midnight, end exclusive."""
+    weekday: int
+    start_minute: int
+    end_minute: int
+
+
+class Shift(NamedTuple):
+    """A single shift inside one weekday. Minutes since midnight, end exclusive."""
+    weekday: int  # 0 = Monday
+    start_minute: int
+    end_minute: int
+    role: str = ""
+
+
+def parse_time(value: Any) -> int:
+    """Parse "HH:MM" into minutes since midnight. "24:00" is allowed as an end time."""
+    if not isinstance(value, str):
+        raise ScheduleError(f"Invalid time {value!r}, expected 'HH:MM'")
+
+    try:
+        hours, minutes = value.split(":")
+        total = int(hours) * 60 + int(minutes)
+    except ValueError:
+        raise ScheduleError(f"Invalid time {value!r}, expected 'HH:MM'")
+
+    if not (0 <= int(minutes) < 60) or not (0 <= total <= MINUTES_PER_DAY):
+        raise ScheduleError(f"Invalid time {value!r}, expected 'HH:MM'")
+
+    return total
+
+
+def format_minute(minute: int) -> str:
+    """Minutes since midnight as "HH:MM" (1440 is "24:00")."""
+    return f"{minute // 60:02d}:{minute % 60:02d}"
+
+
+def format_shift(shift: Shift) -> str:
+    return f"{WEEKDAYS[shift.weekday]} {format_minute(shift.start_minute)}-{format_minute(shift.end_minute)}"
+
+
+def parse_weekday(key: Any) -> int:
+    """Map a schedule key (english/spanish name, 3-letter abbreviation or 0-6) to 0 = Monday."""
+    weekday = WEEKDAY_ALIASES.get(str(key).strip().lower())
+    if weekday is None:
+        raise ScheduleError(f"Unknown weekday {key!r}")
+    return weekday
+
+
+def parse_schedule(schedule: str | dict | None, strict: bool = False) -> list[Shift]:
+    """
+    Expand a Staff.schedule value into shifts sorted by (weekday, start).
+
+    Overnight shifts are split at midnight, so every returned shift lies
+    within a single weekday. With strict=False malformed entries are skipped
+    instead of raising ScheduleError.
+    """
+    if not schedule:
+        return []
+
+    if isinstance(schedule, str):
+        try:
+            schedule = json.loads(schedule)
+        except ValueError:
+            if strict:
+                raise ScheduleError("Schedule is not valid JSON")
+            return []
+
+    if not isinstance(schedule, dict):
+        if strict:
+            raise ScheduleError("Schedule must be a JSON object keyed by weekday")
+        return []
+
+    shifts = []
+    for day_key, day_shifts in schedule.items():
+        try:
+            weekday = parse_weekday(day_key)
+            if not isinstance(day_shifts, list):
+                raise ScheduleError(f"Shifts for {day_key!r} must be a list")
+            for entry in day_shifts:
+                shifts.extend(_parse_shift(weekday, entry))
+        except ScheduleError:
+            if strict:
+                raise
+
+    shifts.sort()
+    return shifts
+
+
+def _parse_shift(weekday: int, entry: Any) -> list[Shift]:
+    role = ""
+    if isinstance(entry, dict):
+        start, end = entry.get("start"), entry.get("end")
+        role = entry.get("role") or ""
+        if not isinstance(role, str):
+            raise ScheduleError(f"Invalid role {role!r}, expected a string")
+        role = role.strip()
+    elif isinstance(entry, (list, tuple)) and len(entry) == 2:
+        start, end = entry
+    else:
+        raise ScheduleError(f"Invalid shift {entry!r}, expected {{'start': 'HH:MM', 'end': 'HH:MM'}}")
+
+    start_minute = parse_time(start)
+    end_minute = parse_time(end)
+
+    if start_minute == MINUTES_PER_DAY:
+        raise ScheduleError(f"Shift cannot start at {start!r}")
+
+    if end_minute > start_minute:
+        return [Shift(weekday, start_minute, end_minute, role)]
+
+    # Overnight: split at midnight
+    shifts = [Shift(weekday, start_minute, MINUTES_PER_DAY, role)]
+    if end_minute > 0:
+        shifts.append(Shift((weekday + 1) % 7, 0, end_minute, role))
+    return shifts
+
+
+def find_overlaps(shifts: list[Shift]) -> list[tuple[Shift, Shift]]:
+    """
+    Pairs of overlapping shifts, by sort and sweep: O(n log n).
+
+    Each shift is compared with the one reaching furthest so far in its
+    weekday. Shifts that only touch (one ends when the next starts) don't
+    overlap. Overnight shifts are already split at midnight.
+    """
+    overlaps = []
+    furthest = None
+    for shift in sorted(shifts):
+        if furthest is not None and furthest.weekday == shift.weekday:
+            if shift.start_minute < furthest.end_minute:
+                overlaps.append((furthest, shift))
+            if shift.end_minute > furthest.end_minute:
+                furthest = shift
+        else:
+            furthest = shift
+    return overlaps
+
+
+def validate_schedule(schedule: str | dict | None) -> list[Shift]:
+    """Parse a schedule strictly and reject overlapping shifts. Raises ScheduleError."""
+    shifts = parse_schedule(schedule, strict=True)
+    overlaps = find_overlaps(shifts)
+    if overlaps:
+        first, second = overlaps[0]
+        raise ScheduleError(f"Shift {format_shift(second)} overlaps {format_shift(first)}")
+    return shifts
+
+
+def schedule_time_to_utc(moment: datetime) -> datetime:
+    """Aware UTC datetime for `moment`. Naive values are schedule wall-clock time."""
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=schedule_timezone)
+    return moment.astimezone(timezone.utc)
+
+
+def to_schedule_time(moment: datetime) -> datetime:
+    """Convert a datetime to schedule wall-clock time. Naive values are already local."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(schedule_timezone).replace(tzinfo=None)
+
+
+def windows_at(moment: datetime) -> list[Window]:
+    """The one-minute window containing `moment`."""
+    local = to_schedule_time(moment)
+    minute = local.hour * 60 + local.minute
+    return [Window(local.weekday(), minute, minute + 1)]
+
+
+def windows_between(start: datetime, end: datetime) -> list[Window]:
+    """Split [start, end) into per-weekday windows in schedule time (at most one full week)."""
+    local_start, local_end = to_schedule_time(start), to_schedule_time(end)
+    if local_end - local_start >= timedelta(days=7):
+        return [Window(weekday, 0, MINUTES_PER_DAY) for weekday in range(7)]
+
+    windows: list[Window] = []
+    day = local_start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    while day < local_end:
+        start_minute = max(0, int((local_start - day).total_seconds() // 60))
+        # Round the end up so a partial minute still counts
+        end_minute = min(MINUTES_PER_DAY, int(-(-(local_end - day).total_seconds() // 60)))
+        windows.append(Window(day.weekday(), start_minute, end_minute))
+        day += timedelta(days=1)
+
+    return windows
@@ -0,0 +1,170 @@
+import asyncio
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from sqlalchemy import func
+from sqlmodel import select
+from database import DatabaseSession
+from models.staff_models import Staff
+from helpers.schedule import Shift, Window, parse_schedule
+from helpers.staff_events import staff_events
+from settings import SHIFT_INDEX_REFRESH_SECONDS, logger
+
+
+class _DayIndex:
+    """
+    Elementary segments of one weekday.
+
+    `boundaries` are the sorted distinct shift start/end minutes and
+    `members[i]` is the set of staff on shift in [boundaries[i], boundaries[i+1]).
+    A point lookup is one bisect plus the size of the answer.
+    """
+
+    __slots__ = ("boundaries", "members")
+
+    def __init__(self, intervals: list[tuple[int, int, str]]):
+        events: dict[int, list[tuple[int, str]]] = {}
+        for start, end, staff_id in intervals:
+            events.setdefault(start, []).append((1, staff_id))
+            events.setdefault(end, []).append((-1, staff_id))
+
+        self.boundaries: list[int] = sorted(events)
+        self.members: list[frozenset[str]] = []
+
+        # A staff member may have touching/overlapping shifts, so count coverage
+        active: dict[str, int] = {}
+        for boundary in self.boundaries:
+            for delta, staff_id in events[boundary]:
+                count = active.get(staff_id, 0) + delta
+                if count:
+                    active[staff_id] = count
+                else:
+                    active.pop(staff_id, None)
+            self.members.append(frozenset(active))
+
+    def during(self, start: int, end: int) -> set[str]:
+        """Staff on shift at any moment of [start, end)."""
+        first = max(bisect_right(self.boundaries, start) - 1, 0)
+        last = bisect_left(self.boundaries, end)
+        result: set[str] = set()
+        for members in self.members[first:last]:
+            result.update(members)
+        return result
+
+
+class ShiftIndex:
+    """
+    In-memory interval index of active staff schedules.
+
+    The index tracks each row's `updated_at`; a refresh first runs a cheap
+    max(updated_at)/count(*) probe and only re-parses the schedules of rows
+    that changed since the last watermark, rebuilding just the weekdays they
+    touch. Lookups never parse JSON. `version` increases on every change so
+    derived caches (e.g. the coverage matrix) know when to recompile.
+    """
+
+    def __init__(self, refresh_seconds: float = SHIFT_INDEX_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._shifts: dict[str, list[Shift]] = {}
+        self._versions: dict[str, datetime] = {}
+        self._days: list[_DayIndex] = [_DayIndex([]) for _ in range(7)]
+        self._watermark: datetime | None = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = asyncio.Lock()
+        self.version = 0
+
+    def mark_stale(self) -> None:
+        """Force a change probe on the next lookup, e.g. after a local write."""
+        self._stale = True
+
+    async def refresh(self, db_session: DatabaseSession) -> None:
+        """Apply rows changed since the last refresh, if the refresh interval allows."""
+        if not self._stale and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+
+        async with self._lock:
+            if not self._stale and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return
+
+            self._stale = False
+            self._checked_at = time.monotonic()
+
+            probe = select(func.max(Staff.updated_at), func.count(Staff.id))
+            watermark, row_count = (await db_session.execute(probe)).one()
+
+            if watermark == self._watermark and row_count == len(self._versions):
+                return
+
+            if self._watermark is None or row_count < len(self._versions):
+                # First load, or rows were hard-deleted: start over
+                await self._load(db_session, since=None)
+            else:
+                await self._load(db_session, since=self._watermark)
+                if row_count != len(self._versions):
+                    # Rows appeared with an updated_at older than the watermark
+                    await self._load(db_session, since=None)
+
+    async def _load(self, db_session: DatabaseSession, since: datetime | None) -> None:
+        statement = select(Staff.id, Staff.schedule, Staff.is_active, Staff.updated_at)
+        if since is not None:
+            # >= so rows sharing the watermark timestamp aren't missed; versions dedupe them
+            statement = statement.where(Staff.updated_at >= since)
+        rows = (await db_session.execute(statement)).all()
+
+        if since is None:
+            seen = {row.id for row in rows}
+            removed = [staff_id for staff_id in self._versions if staff_id not in seen]
+        else:
+            removed = []
+
+        dirty_days: set[int] = set()
+        for staff_id in removed:
+            self._versions.pop(staff_id, None)
+            dirty_days.update(shift.weekday for shift in self._shifts.pop(staff_id, []))
+
+        for row in rows:
+            if self._versions.get(row.id) == row.updated_at:
+                continue
+            self._versions[row.id] = row.updated_at
+            dirty_days.update(shift.weekday for shift in self._shifts.pop(row.id, []))
+            if row.is_active:
+                shifts = parse_schedule(row.schedule)
+                if shifts:
+                    self._shifts[row.id] = shifts
+                    dirty_days.update(shift.weekday for shift in shifts)
+            if self._watermark is None or row.updated_at > self._watermark:
+                self._watermark = row.updated_at
+
+        if dirty_days:
+            self._rebuild_days(dirty_days)
+            self.version += 1
+            logger.info(f"Shift index refreshed: {len(rows)} rows read, weekdays rebuilt {sorted(dirty_days)}")
+
+    def _rebuild_days(self, weekdays: set[int]) -> None:
+        intervals: dict[int, list[tuple[int, int, str]]] = {day: [] for day in weekdays}
+        for staff_id, shifts in self._shifts.items():
+            for shift in shifts:
+                if shift.weekday in intervals:
+                    intervals[shift.weekday].append((shift.start_minute, shift.end_minute, staff_id))
+        for day, day_intervals in intervals.items():
+            self._days[day] = _DayIndex(day_intervals)
+
+    def active_shifts(self) -> list[list[Shift]]:
+        """Parsed shifts of every active staff member with a schedule."""
+        return list(self._shifts.values())
+
+    def staff_shifts(self) -> list[tuple[str, list[Shift]]]:
+        """(staff_id, shifts) of every active staff member with a schedule."""
+        return list(self._shifts.items())
+
+    def on_shift(self, windows: list[Window]) -> set[str]:
+        """Ids of active staff working at any moment of the given windows."""
+        result: set[str] = set()
+        for window in windows:
+            result.update(self._days[window.weekday].during(window.start_minute, window.end_minute))
+        return result
+
+
+shift_index = ShiftIndex()
+staff_events.add_listener(lambda change: shift_index.mark_stale())
@@ -0,0 +1,53 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+from helpers.staff_events import StaffChange, staff_events
+from settings import SINGLE_FLIGHT_ENABLED
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent reads: callers with the same key while a
+    call is in flight await that call's result instead of starting their own.
+
+    The shared call runs as its own task, so one caller disconnecting doesn't
+    cancel it for the others; results are shared as-is and must not be
+    mutated. Nothing is cached once the call finishes. A local write forgets
+    every in-flight call, so requests arriving after it read fresh data.
+    """
+
+    def __init__(self, enabled: bool = SINGLE_FLIGHT_ENABLED):
+        self.enabled = enabled
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+            self.calls += 1
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Mark the exception retrieved, in case every caller went away before it was raised
+        if not task.cancelled():
+            task.exception()
+
+    def forget(self, change: StaffChange | None = None) -> None:
+        """staff_events listener: later callers start a new call instead of joining one begun before the write."""
+        self._calls.clear()
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._calls), "calls": self.calls, "shared": self.shared}
+
+
+staff_reads = SingleFlight()
+staff_events.add_listener(staff_reads.forget)
@@ -0,0 +1,83 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Callable, NamedTuple
+from models.staff_models import Staff
+from helpers.pagination import encode_cursor
+from settings import STAFF_EVENTS_QUEUE_SIZE, logger
+
+
+class StaffChange(NamedTuple):
+    """A committed change to one staff row, ready to push to clients."""
+    event: str  # created | updated | deactivated
+    watermark: str
+    staff: Staff
+
+
+def naive_utc(value: datetime) -> datetime:
+    """Normalize to naive UTC, the form in which updated_at comes back from the database."""
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def staff_watermark(staff: Staff) -> str:
+    """Change-feed position of a row: (updated_at, id)."""
+    return encode_cursor(naive_utc(staff.updated_at).isoformat(), staff.id)
+
+
+def change_event(staff: Staff) -> str:
+    """Classify a row's latest change."""
+    if not staff.is_active:
+        return "deactivated"
+    if naive_utc(staff.created_at) == naive_utc(staff.updated_at):
+        return "created"
+    return "updated"
+
+
+class StaffEventBroker:
+    """
+    In-process fan-out of committed staff changes.
+
+    Handlers call publish() after commit. Listeners (caches, indexes) are
+    called synchronously; subscribers (SSE streams) receive the change on a
+    bounded queue. publish(None) means "rows changed, re-read from the
+    database" and is used by bulk writes. A subscriber whose queue is full
+    gets None as well, so it resyncs instead of silently missing events.
+    """
+
+    def __init__(self, queue_size: int = STAFF_EVENTS_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: set[asyncio.Queue] = set()
+        self._listeners: list[Callable[[StaffChange | None], None]] = []
+
+    def add_listener(self, listener: Callable[[StaffChange | None], None]) -> None:
+        self._listeners.append(listener)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def publish(self, staff: Staff | None) -> None:
+        change = StaffChange(change_event(staff), staff_watermark(staff), staff) if staff else None
+
+        for listener in self._listeners:
+            try:
+                listener(change)
+            except Exception as e:
+                logger.error(f"Staff change listener failed: {e}")
+
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait(change)
+            except asyncio.QueueFull:
+                # Replace the backlog with a resync marker
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+
+staff_events = StaffEventBroker()
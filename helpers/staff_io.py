@@ -0,0 +1,179 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import Iterable, Iterator
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from models.staff_models import Staff, StaffShift
+from helpers.schedule import ScheduleError, validate_schedule
+from helpers.staff_shifts import shift_rows
+
+# Bulk import/export of staff as CSV or NDJSON.
+# Import columns: name (required), email, schedule (JSON object or string), is_active.
+# Export columns: EXPORT_FIELDS.
+
+FORMATS = ("csv", "ndjson")
+EXPORT_FIELDS = ["id", "name", "email", "schedule", "is_active", "created_at", "updated_at"]
+TRUE_VALUES = {"1", "true", "yes", "y", "t"}
+FALSE_VALUES = {"0", "false", "no", "n", "f"}
+
+
+class RowError(ValueError):
+    """A single import row that could not be used."""
+
+
+def read_records(lines: Iterable[str], fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Yield (line_number, record, error) for every non-empty input row."""
+    if fmt == "csv":
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield reader.line_num, record, None
+        return
+
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_number, None, f"Invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_number, None, "Each line must be a JSON object"
+            continue
+        yield line_number, record, None
+
+
+def record_to_row(record: dict, now: datetime) -> dict:
+    """Validate an import record and build the Staff insert values. Raises RowError."""
+    name = record.get("name")
+    if not isinstance(name, str) or not name.strip():
+        raise RowError("name is required")
+
+    email = record.get("email")
+    if email is not None and not isinstance(email, str):
+        raise RowError("email must be a string")
+
+    schedule = record.get("schedule") or "{}"
+    if isinstance(schedule, str):
+        try:
+            parsed = json.loads(schedule)
+        except ValueError:
+            raise RowError("schedule is not valid JSON")
+    else:
+        parsed = schedule
+    try:
+        validate_schedule(parsed)
+    except ScheduleError as e:
+        raise RowError(f"Invalid schedule: {e}")
+
+    # A missing, null or blank is_active means active, as in POST /staff
+    # (csv.DictReader gives None for the cells of a short row)
+    is_active = record.get("is_active")
+    if is_active is None or (isinstance(is_active, str) and not is_active.strip()):
+        is_active = True
+    elif isinstance(is_active, str):
+        value = is_active.strip().lower()
+        if value not in TRUE_VALUES | FALSE_VALUES:
+            raise RowError(f"Invalid is_active value {is_active!r}")
+        is_active = value in TRUE_VALUES
+
+    return Staff(
+        name=name.strip(),
+        email=(email or "").strip() or None,
+        schedule=schedule if isinstance(schedule, str) else json.dumps(parsed),
+        is_active=bool(is_active),
+        created_at=now,
+        updated_at=now
+    ).model_dump()
+
+
+def import_staff_records(session: Session, lines: Iterable[str], fmt: str, batch_size: int) -> dict:
+    """
+    Insert staff rows from CSV/NDJSON lines in batches.
+
+    Each batch is one executemany INSERT (plus one for its shifts) and one
+    commit. If a batch fails, its rows are retried one by one so only the
+    offending rows are reported. Returns {"created": int, "errors": [...]}.
+    """
+    created = 0
+    errors: list[dict] = []
+    batch: list[tuple[int, dict]] = []
+    now = datetime.now(timezone.utc)
+
+    def flush_batch():
+        nonlocal created
+        if not batch:
+            return
+        try:
+            _insert_rows(session, [row for _, row in batch])
+            session.commit()
+            created += len(batch)
+        except SQLAlchemyError:
+            session.rollback()
+            for line_number, row in batch:
+                try:
+                    _insert_rows(session, [row])
+                    session.commit()
+                    created += 1
+                except SQLAlchemyError as e:
+                    session.rollback()
+                    errors.append({"line": line_number, "error": str(e.orig if hasattr(e, "orig") else e)})
+        batch.clear()
+
+    for line_number, record, error in read_records(lines, fmt):
+        if error is None:
+            try:
+                batch.append((line_number, record_to_row(record, now)))
+            except RowError as e:
+                error = str(e)
+        if error is not None:
+            errors.append({"line": line_number, "error": error})
+        if len(batch) >= batch_size:
+            flush_batch()
+
+    flush_batch()
+    return {"created": created, "errors": errors}
+
+
+def _insert_rows(session: Session, rows: list[dict]) -> None:
+    session.execute(insert(Staff), rows)
+    shifts = [shift for row in rows for shift in shift_rows(row["id"], row["schedule"])]
+    if shifts:
+        session.execute(insert(StaffShift), shifts)
+
+
+def export_header(fmt: str) -> str:
+    """Text written before the first exported row."""
+    if fmt == "csv":
+        buffer = io.StringIO()
+        csv.writer(buffer).writerow(EXPORT_FIELDS)
+        return buffer.getvalue()
+    return ""
+
+
+def export_rows(staff_rows: Iterable[Staff], fmt: str) -> str:
+    """Serialize a batch of Staff rows."""
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        for staff in staff_rows:
+            writer.writerow([
+                staff.id, staff.name, staff.email or "", staff.schedule, staff.is_active,
+                staff.created_at.isoformat(), staff.updated_at.isoformat()
+            ])
+    else:
+        for staff in staff_rows:
+            buffer.write(json.dumps({
+                "id": staff.id,
+                "name": staff.name,
+                "email": staff.email,
+                "schedule": staff.schedule,
+                "is_active": staff.is_active,
+                "created_at": staff.created_at.isoformat(),
+                "updated_at": staff.updated_at.isoformat(),
+            }))
+            buffer.write("\n")
+    return buffer.getvalue()
@@ -0,0 +1,78 @@
+from typing import Any, Iterable
+import orjson
+from fastapi import HTTPException, status
+from fastapi.responses import Response
+from sqlalchemy.engine import Row
+from models.staff_models import Staff
+
+# Single-pass JSON for staff payloads.
+# Rows go straight from the database to orjson, skipping the StaffResponse
+# validation and response_model re-serialization. Output is field for field
+# what StaffResponse would produce; the schemas still document the routes.
+
+STAFF_FIELDS = ("id", "name", "email", "schedule", "is_active", "created_at", "updated_at")
+# Select these instead of the Staff entity on list routes: plain rows skip ORM identity-map work
+STAFF_COLUMNS = tuple(getattr(Staff, field) for field in STAFF_FIELDS)
+
+# UTC datetimes end in "Z", as pydantic renders them
+_OPTIONS = orjson.OPT_UTC_Z
+
+
+def parse_fields(fields: str | None) -> tuple[str, ...]:
+    """Fields of a `fields=id,name` projection, in STAFF_FIELDS order (all if None). Raises 400."""
+    if fields is None:
+        return STAFF_FIELDS
+
+    requested = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = requested.difference(STAFF_FIELDS)
+    if unknown or not requested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields {sorted(unknown)}; choose from {', '.join(STAFF_FIELDS)}"
+        )
+    return tuple(field for field in STAFF_FIELDS if field in requested)
+
+
+def staff_columns(fields: tuple[str, ...], *required: str) -> tuple:
+    """Columns to select for a projection, plus those the route needs itself (cursor, ETag)."""
+    return tuple(getattr(Staff, field) for field in STAFF_FIELDS if field in fields or field in required)
+
+
+def staff_dict(staff: Staff | Row, fields: tuple[str, ...] = STAFF_FIELDS) -> dict:
+    """StaffResponse fields (or a projection of them) of a Staff object or a row selected with STAFF_COLUMNS."""
+    if isinstance(staff, Row):
+        if fields == STAFF_FIELDS:
+            return staff._asdict()
+        mapping = staff._mapping
+        return {field: mapping[field] for field in fields}
+    return {field: getattr(staff, field) for field in fields}
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, option=_OPTIONS)
+
+
+def encode_staff(staff, fields: tuple[str, ...] = STAFF_FIELDS) -> bytes:
+    """JSON of one staff row; snapshot records (helpers.staff_snapshot) carry theirs pre-encoded."""
+    encoded = getattr(staff, "encoded", None) if fields == STAFF_FIELDS else None
+    return encoded if encoded is not None else dumps(staff_dict(staff, fields))
+
+
+def encode_staff_array(staff_rows: Iterable, fields: tuple[str, ...] = STAFF_FIELDS) -> bytes:
+    """JSON array of staff rows, splicing pre-encoded records as they are."""
+    return b"[" + b",".join(encode_staff(staff, fields) for staff in staff_rows) + b"]"
+
+
+def staff_json_lines(staff_rows: Iterable, fields: tuple[str, ...] = STAFF_FIELDS) -> bytes:
+    """NDJSON for a batch of staff rows."""
+    return b"".join(encode_staff(staff, fields) + b"\n" for staff in staff_rows)
+
+
+class FastJSONResponse(Response):
+    """JSON response encoded once with orjson; content may hold rows as dicts, or be already-encoded bytes."""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
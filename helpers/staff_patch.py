@@ -0,0 +1,218 @@
+import copy
+import json
+from typing import Any
+from fastapi import HTTPException, status
+from helpers.schedule import ScheduleError, validate_schedule
+
+# PATCH /staff/{id} bodies: RFC 7396 merge patch or RFC 6902 JSON Patch over
+# the document {"name": ..., "email": ..., "schedule": {weekday: [shifts]}}.
+
+MERGE_PATCH_MEDIA_TYPE = "application/merge-patch+json"
+JSON_PATCH_MEDIA_TYPE = "application/json-patch+json"
+
+PATCHABLE_FIELDS = ("name", "email", "schedule")
+JSON_PATCH_OPS = ("add", "remove", "replace", "move", "copy", "test")
+
+
+def _bad_request(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _conflict(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_409_CONFLICT, detail=detail)
+
+
+def _unprocessable(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=detail)
+
+
+def staff_document(name: str, email: str | None, schedule: str) -> dict:
+    """The patchable view of a staff row. A schedule that isn't a JSON object stays a string."""
+    try:
+        parsed = json.loads(schedule) if schedule else {}
+    except ValueError:
+        parsed = None
+    return {"name": name, "email": email, "schedule": parsed if isinstance(parsed, dict) else schedule}
+
+
+def needs_current(patch: Any, media_type: str) -> bool:
+    """
+    True if applying the patch depends on the stored row.
+
+    Merge patches that only set name/email and/or replace the whole schedule
+    with a JSON string can be written blind; JSON Patch and merge patches
+    into the schedule object can't.
+    """
+    return media_type == JSON_PATCH_MEDIA_TYPE or isinstance(patch.get("schedule"), dict)
+
+
+def parse_patch(body: bytes, media_type: str) -> Any:
+    """Decode and shape-check a PATCH body. Raises 400."""
+    try:
+        patch = json.loads(body)
+    except ValueError:
+        raise _bad_request("Patch body is not valid JSON")
+
+    if media_type == JSON_PATCH_MEDIA_TYPE:
+        if not isinstance(patch, list) or not all(isinstance(operation, dict) for operation in patch):
+            raise _bad_request("A JSON Patch must be an array of operations")
+        for operation in patch:
+            if operation.get("op") not in JSON_PATCH_OPS:
+                raise _bad_request(f"Unknown JSON Patch op {operation.get('op')!r}")
+            _field(operation.get("path"))
+            if operation["op"] in ("move", "copy"):
+                _field(operation.get("from"))
+            if operation["op"] in ("add", "replace", "test") and "value" not in operation:
+                raise _bad_request(f"JSON Patch op {operation['op']!r} requires a value")
+        return patch
+
+    if not isinstance(patch, dict):
+        raise _bad_request("A merge patch must be a JSON object")
+    unknown = set(patch).difference(PATCHABLE_FIELDS)
+    if unknown:
+        raise _unprocessable(f"Cannot patch {sorted(unknown)}; patchable fields are {', '.join(PATCHABLE_FIELDS)}")
+    return patch
+
+
+def apply_patch(document: dict, patch: Any, media_type: str) -> dict:
+    """The patched copy of document. Raises 409 if a JSON Patch doesn't fit the current document."""
+    if media_type == JSON_PATCH_MEDIA_TYPE:
+        return apply_json_patch(document, patch)
+    return merge_patch(document, patch)
+
+
+def merge_patch(target: Any, patch: Any) -> Any:
+    """RFC 7396: objects merge recursively, null removes a member, anything else replaces."""
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    result = dict(target) if isinstance(target, dict) else {}
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
+
+
+def _pointer(pointer: Any) -> list[str]:
+    """RFC 6901 reference tokens of a JSON Pointer."""
+    if not isinstance(pointer, str) or (pointer and not pointer.startswith("/")):
+        raise _bad_request(f"Invalid JSON Pointer {pointer!r}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer.split("/")[1:]]
+
+
+def _field(pointer: Any) -> list[str]:
+    tokens = _pointer(pointer)
+    if not tokens or tokens[0] not in PATCHABLE_FIELDS:
+        raise _unprocessable(f"Cannot patch {pointer!r}; patchable fields are {', '.join(PATCHABLE_FIELDS)}")
+    return tokens
+
+
+def _index(array: list, token: str, pointer: str, append: bool = False) -> int:
+    if append and token == "-":
+        return len(array)
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise _conflict(f"Invalid array index in {pointer!r}")
+    index = int(token)
+    if index > len(array) or (index == len(array) and not append):
+        raise _conflict(f"Array index out of range in {pointer!r}")
+    return index
+
+
+def _parent(document: dict, tokens: list[str], pointer: str) -> Any:
+    container = document
+    for token in tokens[:-1]:
+        if isinstance(container, dict) and token in container:
+            container = container[token]
+        elif isinstance(container, list):
+            container = container[_index(container, token, pointer)]
+        else:
+            raise _conflict(f"Path {pointer!r} does not exist")
+    if not isinstance(container, (dict, list)):
+        raise _conflict(f"Path {pointer!r} does not exist")
+    return container
+
+
+def _get(document: dict, pointer: str) -> Any:
+    tokens = _field(pointer)
+    container, token = _parent(document, tokens, pointer), tokens[-1]
+    if isinstance(container, list):
+        return container[_index(container, token, pointer)]
+    if token not in container:
+        raise _conflict(f"Path {pointer!r} does not exist")
+    return container[token]
+
+
+def _add(document: dict, pointer: str, value: Any) -> None:
+    tokens = _field(pointer)
+    container, token = _parent(document, tokens, pointer), tokens[-1]
+    if isinstance(container, list):
+        container.insert(_index(container, token, pointer, append=True), value)
+    else:
+        container[token] = value
+
+
+def _remove(document: dict, pointer: str) -> Any:
+    tokens = _field(pointer)
+    container, token = _parent(document, tokens, pointer), tokens[-1]
+    if isinstance(container, list):
+        return container.pop(_index(container, token, pointer))
+    if token not in container:
+        raise _conflict(f"Path {pointer!r} does not exist")
+    return container.pop(token)
+
+
+def apply_json_patch(document: dict, operations: list[dict]) -> dict:
+    """RFC 6902: apply every operation in order to a copy of document, or none of them."""
+    result = copy.deepcopy(document)
+    for operation in operations:
+        op, path = operation["op"], operation["path"]
+        if op == "add":
+            _add(result, path, copy.deepcopy(operation["value"]))
+        elif op == "remove":
+            _remove(result, path)
+        elif op == "replace":
+            _remove(result, path)
+            _add(result, path, copy.deepcopy(operation["value"]))
+        elif op == "move":
+            source = operation["from"]
+            if path != source and path.startswith(source + "/"):
+                raise _conflict(f"Cannot move {source!r} into itself")
+            _add(result, path, _remove(result, source))
+        elif op == "copy":
+            _add(result, path, copy.deepcopy(_get(result, operation["from"])))
+        elif _get(result, path) != operation["value"]:
+            raise _conflict(f"Test failed at {path!r}")
+    return result
+
+
+def staff_changes(before: dict, after: dict) -> dict:
+    """
+    Column values to write for a patched document: only fields that changed.
+
+    A field missing from (or null in) `after` is cleared. Raises 422 for a
+    missing or non-string name, a non-string email, or a malformed or
+    overlapping schedule, as StaffRequest would.
+    """
+    changes = {}
+    for field in PATCHABLE_FIELDS:
+        if field not in after and field not in before:
+            continue
+        value = after.get(field)
+        if field == "schedule" and value is None:
+            value = {}
+        if field in before and value == before[field]:
+            continue
+
+        if field == "name" and not isinstance(value, str):
+            raise _unprocessable("name must be a string")
+        if field == "email" and value is not None and not isinstance(value, str):
+            raise _unprocessable("email must be a string or null")
+        if field == "schedule":
+            try:
+                validate_schedule(value)
+            except ScheduleError as e:
+                raise _unprocessable(str(e))
+            value = value if isinstance(value, str) else json.dumps(value)
+        changes[field] = value
+    return changes
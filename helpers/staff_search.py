@@ -0,0 +1,311 @@
+import asyncio
+import math
+from collections import defaultdict
+import re
+import time
+import unicodedata
+from bisect import bisect_left, insort
+from datetime import datetime
+from functools import lru_cache
+from sqlalchemy import Float, case, cast, func, literal, or_
+from sqlmodel import select
+from database import DatabaseSession
+from models.staff_models import Staff
+from helpers.staff_events import StaffChange, naive_utc, staff_events
+from settings import STAFF_SEARCH_REFRESH_SECONDS, logger
+
+# Typeahead ranking, shared by the in-memory index and the Postgres query:
+#   1.0  the name starts with the query
+#   0.9  a word of the name or email (or the whole email) starts with the query
+#   0.8 * fraction of the query's trigrams found in the name or email, for fuzzy
+#        matches; at least MIN_SIMILARITY (pg_trgm's word_similarity default)
+NAME_PREFIX_SCORE = 1.0
+WORD_PREFIX_SCORE = 0.9
+FUZZY_WEIGHT = 0.8
+MIN_SIMILARITY = 0.6
+
+_WORD_SPLIT = re.compile(r"[^\w]+")
+
+
+def normalize(text: str) -> str:
+    """Case- and accent-insensitive form: "José  Núñez" -> "jose nunez"."""
+    if text.isascii():
+        return " ".join(text.lower().split())
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.casefold().split())
+
+
+def words(text: str) -> list[str]:
+    return [word for word in _WORD_SPLIT.split(text) if word]
+
+
+@lru_cache(maxsize=65536)
+def word_trigrams(word: str) -> frozenset[str]:
+    """pg_trgm-style trigrams: the word padded with two leading and one trailing space."""
+    padded = f"  {word} "
+    return frozenset(padded[i:i + 3] for i in range(len(word) + 1))
+
+
+def trigrams(text: str) -> set[str]:
+    result: set[str] = set()
+    for word in words(text):
+        result |= word_trigrams(word)
+    return result
+
+
+class _Entry:
+    __slots__ = ("name", "email", "is_active", "key", "words", "trigrams")
+
+    def __init__(self, name: str, email: str | None, is_active: bool):
+        self.name = name
+        self.email = email
+        self.is_active = is_active
+        self.key = normalize(name)
+        email_key = normalize(email) if email else ""
+        field_words = set(words(self.key) + words(email_key))
+        self.trigrams = frozenset().union(*map(word_trigrams, field_words))
+        # The whole email is a word too, so "ana.lo" completes "ana.lopez@example.com"
+        if email_key:
+            field_words.add(email_key)
+        self.words = tuple(field_words)
+
+    def result(self, staff_id: str, score: float) -> dict:
+        return {"id": staff_id, "name": self.name, "email": self.email, "is_active": self.is_active, "score": score}
+
+
+class StaffSearchIndex:
+    """
+    In-memory typeahead index over staff names and emails.
+
+    Prefix matches come from two sorted lists, (name, id) and (word, name, id),
+    so the best `limit` results are a bisect plus a short scan away, already
+    in rank order. Fuzzy matches use trigram posting sets; a candidate needs
+    at least ceil(MIN_SIMILARITY * |query trigrams|) shared trigrams, so only
+    the rarest few posting sets of the query have to be read.
+
+    Local writes are applied as they're published on staff_events; writes
+    from other processes are picked up by the same updated_at watermark
+    probe ShiftIndex uses, at most every `refresh_seconds`.
+    """
+
+    def __init__(self, refresh_seconds: float = STAFF_SEARCH_REFRESH_SECONDS):
+        self.refresh_seconds = refresh_seconds
+        self._entries: dict[str, _Entry] = {}
+        self._versions: dict[str, datetime] = {}
+        self._names: list[tuple[str, str]] = []
+        self._words: list[tuple[str, str, str]] = []
+        self._postings: defaultdict[str, set[str]] = defaultdict(set)
+        self._watermark: datetime | None = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = asyncio.Lock()
+
+    def mark_stale(self) -> None:
+        self._stale = True
+
+    def apply(self, change: StaffChange | None) -> None:
+        """staff_events listener: index a committed change right away."""
+        if change is None:
+            self.mark_stale()
+            return
+        staff = change.staff
+        self._put(staff.id, staff.name, staff.email, staff.is_active, naive_utc(staff.updated_at))
+
+    async def refresh(self, db_session: DatabaseSession) -> None:
+        """Apply rows changed since the last refresh, if the refresh interval allows."""
+        if not self._stale and time.monotonic() - self._checked_at < self.refresh_seconds:
+            return
+
+        async with self._lock:
+            if not self._stale and time.monotonic() - self._checked_at < self.refresh_seconds:
+                return
+
+            self._stale = False
+            self._checked_at = time.monotonic()
+
+            probe = select(func.max(Staff.updated_at), func.count(Staff.id))
+            watermark, row_count = (await db_session.execute(probe)).one()
+
+            if watermark == self._watermark and row_count == len(self._versions):
+                return
+
+            if self._watermark is None or row_count < len(self._versions):
+                # First load, or rows were hard-deleted: start over
+                await self._load(db_session, since=None)
+            else:
+                await self._load(db_session, since=self._watermark)
+                if row_count != len(self._versions):
+                    await self._load(db_session, since=None)
+
+    async def _load(self, db_session: DatabaseSession, since: datetime | None) -> None:
+        statement = select(Staff.id, Staff.name, Staff.email, Staff.is_active, Staff.updated_at)
+        if since is not None:
+            statement = statement.where(Staff.updated_at >= since)
+        rows = (await db_session.execute(statement)).all()
+
+        if since is None:
+            await asyncio.to_thread(self._rebuild, rows)
+            # Local writes applied during the build went to the old index; re-probe on the next search
+            self._stale = True
+        else:
+            for row in rows:
+                if self._versions.get(row.id) != row.updated_at:
+                    self._put(row.id, row.name, row.email, row.is_active, row.updated_at)
+                # Only polls move the watermark: a local write mustn't hide an older commit from another process
+                if row.updated_at > self._watermark:
+                    self._watermark = row.updated_at
+        logger.info(f"Staff search index refreshed: {len(rows)} rows read")
+
+    def _rebuild(self, rows) -> None:
+        """
+        Full load: build the sorted lists in one sort instead of row-by-row inserts.
+
+        Runs in a worker thread so the event loop keeps serving requests;
+        searches see the old index until the new one is swapped in.
+        """
+        entries, versions, postings = {}, {}, defaultdict(set)
+        names, word_keys = [], []
+        watermark = None
+        for staff_id, name, email, is_active, updated_at in rows:
+            entry = _Entry(name, email, is_active)
+            entries[staff_id] = entry
+            versions[staff_id] = updated_at
+            names.append((entry.key, staff_id))
+            word_keys.extend((word, entry.key, staff_id) for word in entry.words)
+            for trigram in entry.trigrams:
+                postings[trigram].add(staff_id)
+            if watermark is None or updated_at > watermark:
+                watermark = updated_at
+        names.sort()
+        word_keys.sort()
+        self._entries, self._versions, self._postings = entries, versions, postings
+        self._names, self._words, self._watermark = names, word_keys, watermark
+
+    def _put(self, staff_id: str, name: str, email: str | None, is_active: bool, updated_at: datetime) -> None:
+        self._remove(staff_id)
+        entry = _Entry(name, email, is_active)
+        self._entries[staff_id] = entry
+        self._versions[staff_id] = updated_at
+        insort(self._names, (entry.key, staff_id))
+        for word in entry.words:
+            insort(self._words, (word, entry.key, staff_id))
+        for trigram in entry.trigrams:
+            self._postings[trigram].add(staff_id)
+
+    def _remove(self, staff_id: str) -> None:
+        entry = self._entries.pop(staff_id, None)
+        if entry is None:
+            return
+        _discard(self._names, (entry.key, staff_id))
+        for word in entry.words:
+            _discard(self._words, (word, entry.key, staff_id))
+        for trigram in entry.trigrams:
+            postings = self._postings[trigram]
+            postings.discard(staff_id)
+            if not postings:
+                del self._postings[trigram]
+
+    def search(self, query: str, limit: int, is_active: bool | None = None) -> list[dict]:
+        """Best `limit` matches for `query`, ranked as described at the top of this module."""
+        key = normalize(query)
+        if not key:
+            return []
+
+        results: list[dict] = []
+        seen: set[str] = set()
+
+        def take(staff_id: str, score: float) -> None:
+            entry = self._entries[staff_id]
+            if staff_id in seen or (is_active is not None and entry.is_active != is_active):
+                return
+            seen.add(staff_id)
+            results.append(entry.result(staff_id, score))
+
+        i = bisect_left(self._names, (key,))
+        while len(results) < limit and i < len(self._names) and self._names[i][0].startswith(key):
+            take(self._names[i][1], NAME_PREFIX_SCORE)
+            i += 1
+
+        i = bisect_left(self._words, (key,))
+        while len(results) < limit and i < len(self._words) and self._words[i][0].startswith(key):
+            take(self._words[i][2], WORD_PREFIX_SCORE)
+            i += 1
+
+        if len(results) < limit:
+            for staff_id, score in self._fuzzy(key, seen, is_active)[:limit - len(results)]:
+                take(staff_id, score)
+
+        return results
+
+    def _fuzzy(self, key: str, seen: set[str], is_active: bool | None) -> list[tuple[str, float]]:
+        query_trigrams = trigrams(key)
+        if not query_trigrams:
+            return []
+
+        required = math.ceil(MIN_SIMILARITY * len(query_trigrams))
+        # A candidate missing all of the rarest (n - required + 1) trigrams can't reach `required`
+        rarest = sorted(query_trigrams, key=lambda trigram: len(self._postings.get(trigram, ())))
+        candidates: set[str] = set()
+        for trigram in rarest[:len(query_trigrams) - required + 1]:
+            candidates.update(self._postings.get(trigram, ()))
+
+        matches = []
+        for staff_id in candidates - seen:
+            entry = self._entries[staff_id]
+            if is_active is not None and entry.is_active != is_active:
+                continue
+            shared = len(query_trigrams & entry.trigrams)
+            if shared >= required:
+                score = round(FUZZY_WEIGHT * shared / len(query_trigrams), 4)
+                matches.append((-score, entry.key, staff_id))
+        matches.sort()
+        return [(staff_id, -score) for score, _, staff_id in matches]
+
+
+def _discard(sorted_list: list, item: tuple) -> None:
+    i = bisect_left(sorted_list, item)
+    if i < len(sorted_list) and sorted_list[i] == item:
+        del sorted_list[i]
+
+
+def search_statement(query: str, limit: int, is_active: bool | None = None):
+    """
+    Postgres search backed by the pg_trgm GIN indexes on lower(name) and
+    lower(coalesce(email, '')) (migration 0002).
+
+    Same ranking tiers as StaffSearchIndex, with pg_trgm's word_similarity
+    as the fuzzy score and without accent folding (that needs unaccent).
+    """
+    key = " ".join(query.casefold().split())
+    escaped = key.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    name, email = func.lower(Staff.name), func.lower(func.coalesce(Staff.email, ""))
+    similarity = func.greatest(func.word_similarity(key, name), func.word_similarity(key, email))
+    word_start = "\\m" + re.escape(key)
+
+    score = cast(case(
+        (name.like(f"{escaped}%"), NAME_PREFIX_SCORE),
+        (or_(name.regexp_match(word_start), email.regexp_match(word_start), email.like(f"{escaped}%")),
+         WORD_PREFIX_SCORE),
+        else_=FUZZY_WEIGHT * similarity
+    ), Float).label("score")
+
+    # LIKE '%q%' and <% (word_similarity >= pg_trgm.word_similarity_threshold) use the trigram indexes
+    statement = (
+        select(Staff.id, Staff.name, Staff.email, Staff.is_active, score)
+        .where(or_(
+            name.like(f"%{escaped}%"),
+            email.like(f"%{escaped}%"),
+            literal(key).op("<%")(name),
+            literal(key).op("<%")(email)
+        ))
+        .order_by(score.desc(), Staff.name, Staff.id)
+        .limit(limit)
+    )
+    if is_active is not None:
+        statement = statement.where(Staff.is_active == is_active)
+    return statement
+
+
+staff_search_index = StaffSearchIndex()
+staff_events.add_listener(staff_search_index.apply)
@@ -0,0 +1,74 @@
+from sqlalchemy import and_, delete, insert, or_
+from sqlalchemy.orm import Session
+from sqlmodel import select
+from models.staff_models import Staff, StaffShift
+from helpers.schedule import Window, parse_schedule
+
+
+def shift_rows(staff_id: str, schedule: str) -> list[dict]:
+    """staff_shift insert values for one staff member's schedule."""
+    return [
+        {
+            "staff_id": staff_id,
+            "weekday": shift.weekday,
+            "start_minute": shift.start_minute,
+            "end_minute": shift.end_minute,
+        }
+        for shift in parse_schedule(schedule)
+    ]
+
+
+def replace_staff_shifts(session: Session, staff: Staff) -> None:
+    """
+    Rewrite the staff_shift rows of one staff member from its schedule.
+
+    Runs inside the caller's transaction, so the shifts commit (or roll
+    back) together with the Staff row. Use through DatabaseSession.run_sync.
+    """
+    # The staff row must be flushed before its shifts can reference it
+    session.flush()
+    session.execute(delete(StaffShift).where(StaffShift.staff_id == staff.id))
+
+    rows = shift_rows(staff.id, staff.schedule)
+    if rows:
+        session.execute(insert(StaffShift), rows)
+
+
+def backfill_staff_shifts(session: Session, batch_size: int = 500) -> int:
+    """Rebuild staff_shift for every Staff row, committing per batch. Returns rows processed."""
+    processed = 0
+    last_id = ""
+
+    while True:
+        batch = session.execute(
+            select(Staff.id, Staff.schedule)
+            .where(Staff.id > last_id)
+            .order_by(Staff.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return processed
+
+        staff_ids = [row.id for row in batch]
+        session.execute(delete(StaffShift).where(StaffShift.staff_id.in_(staff_ids)))
+
+        rows = [shift for row in batch for shift in shift_rows(row.id, row.schedule)]
+        if rows:
+            session.execute(insert(StaffShift), rows)
+
+        session.commit()
+        processed += len(batch)
+        last_id = staff_ids[-1]
+
+
+def on_shift_clause(windows: list[Window]):
+    """WHERE clause matching staff with a stored shift overlapping any of the windows."""
+    overlaps = [
+        and_(
+            StaffShift.weekday == window.weekday,
+            StaffShift.start_minute < window.end_minute,
+            StaffShift.end_minute > window.start_minute
+        )
+        for window in windows
+    ]
+    return Staff.id.in_(select(StaffShift.staff_id).where(or_(*overlaps)))
@@ -0,0 +1,229 @@
+import asyncio
+import heapq
+import sys
+import time
+from bisect import bisect_right, insort
+from datetime import datetime
+from sqlalchemy import func
+from sqlmodel import select
+from database import DatabaseSession, open_session
+from models.staff_models import Staff
+from helpers.staff_events import StaffChange, naive_utc, staff_events
+from helpers.staff_json import STAFF_COLUMNS, dumps, staff_dict
+from settings import STAFF_SNAPSHOT_ENABLED, STAFF_SNAPSHOT_REFRESH_SECONDS, logger
+
+
+class StaffRecord:
+    """One staff row as served from the snapshot, with its full JSON encoded once."""
+
+    __slots__ = ("id", "name", "email", "schedule", "is_active", "created_at", "updated_at", "encoded")
+
+    def __init__(self, staff):
+        self.id = staff.id
+        self.name = staff.name
+        self.email = staff.email
+        self.schedule = staff.schedule
+        self.is_active = staff.is_active
+        # Naive UTC, as the database returns them, so the JSON and ETags match the SQL path
+        self.created_at = naive_utc(staff.created_at)
+        self.updated_at = naive_utc(staff.updated_at)
+        self.encoded = dumps(staff_dict(self))
+
+    @property
+    def key(self) -> tuple[str, str]:
+        return self.name, self.id
+
+    def size(self) -> int:
+        """Approximate bytes held by this record."""
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(value) for value in (self.id, self.name, self.email, self.schedule, self.encoded)
+        )
+
+
+class StaffSnapshot:
+    """
+    In-memory copy of every Staff row, answering GET /staff, /staff/{id} and
+    /staff/batch without SQL.
+
+    Rows are kept in (name, id) order per is_active value, so a page is a
+    bisect and a slice (a merge of both lists when unfiltered). Names compare
+    by code point, as in SQLite and Postgres' C collation.
+
+    `run()` polls the database every `refresh_seconds` with the same
+    max(updated_at)/count probe as ShiftIndex and reads only rows changed
+    since the watermark; writes made by this process are applied as they're
+    published on staff_events, and a bulk write (published as None) starts
+    a refresh from the primary right away. Routes fall back to SQL until the first load
+    and whenever the last successful refresh is more than three intervals old.
+    """
+
+    def __init__(self, enabled: bool = STAFF_SNAPSHOT_ENABLED, refresh_seconds: float = STAFF_SNAPSHOT_REFRESH_SECONDS):
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self._records: dict[str, StaffRecord] = {}
+        self._order: dict[bool, list[tuple[str, str]]] = {True: [], False: []}
+        # Latest updated_at per is_active value; None means recompute on next use
+        self._latest: dict[bool, datetime | None] = {True: None, False: None}
+        self._watermark: datetime | None = None
+        self._refreshed_at: float | None = None
+        self._lock = asyncio.Lock()
+        self._tasks: set[asyncio.Task] = set()
+        self.memory_bytes = 0
+        self.last_refresh_seconds = 0.0
+        self.refresh_errors = 0
+
+    @property
+    def serving(self) -> bool:
+        return (
+            self.enabled and self._refreshed_at is not None
+            and time.monotonic() - self._refreshed_at < 3 * self.refresh_seconds
+        )
+
+    def get(self, staff_id: str) -> StaffRecord | None:
+        return self._records.get(staff_id)
+
+    def page(self, is_active: bool | None, after: tuple[str, str] | None, limit: int | None) -> list[StaffRecord]:
+        """Records in (name, id) order after the keyset `after`, at most `limit` of them."""
+        lists = [self._order[is_active]] if is_active is not None else [self._order[True], self._order[False]]
+        slices = []
+        for keys in lists:
+            start = bisect_right(keys, after) if after is not None else 0
+            slices.append(keys[start:] if limit is None else keys[start:start + limit])
+
+        keys = slices[0] if len(slices) == 1 else list(heapq.merge(*slices))
+        if limit is not None:
+            keys = keys[:limit]
+        return [self._records[staff_id] for _, staff_id in keys]
+
+    def probe(self, is_active: bool | None) -> tuple[datetime | None, int]:
+        """max(updated_at) and count(*), as the list route's ETag probe would read them."""
+        statuses = [is_active] if is_active is not None else [True, False]
+        latest_values = [self._latest_of(status) for status in statuses]
+        latest_values = [value for value in latest_values if value is not None]
+        return max(latest_values, default=None), sum(len(self._order[status]) for status in statuses)
+
+    def _latest_of(self, is_active: bool) -> datetime | None:
+        if self._latest[is_active] is None and self._order[is_active]:
+            self._latest[is_active] = max(self._records[staff_id].updated_at for _, staff_id in self._order[is_active])
+        return self._latest[is_active]
+
+    def apply(self, change: StaffChange | None) -> None:
+        """staff_events listener: serve a committed local write right away."""
+        if self._refreshed_at is None:
+            return
+        if change is not None:
+            self._put(StaffRecord(change.staff))
+            return
+        task = asyncio.get_running_loop().create_task(self._reload())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _reload(self) -> None:
+        """Refresh after a bulk write, from the primary, which already has it."""
+        try:
+            async with open_session() as db_session:
+                await self.refresh(db_session)
+        except Exception as e:
+            self.refresh_errors += 1
+            logger.error(f"Staff snapshot refresh failed: {e}")
+
+    def _put(self, record: StaffRecord) -> None:
+        current = self._records.get(record.id)
+        if current is not None:
+            if record.updated_at <= current.updated_at:
+                return
+            self._drop(current)
+
+        self._records[record.id] = record
+        insort(self._order[record.is_active], record.key)
+        latest = self._latest[record.is_active]
+        if latest is not None and record.updated_at > latest:
+            self._latest[record.is_active] = record.updated_at
+        self.memory_bytes += record.size()
+
+    def _drop(self, record: StaffRecord) -> None:
+        del self._records[record.id]
+        keys = self._order[record.is_active]
+        i = bisect_right(keys, record.key) - 1
+        if i >= 0 and keys[i] == record.key:
+            del keys[i]
+        if record.updated_at == self._latest[record.is_active]:
+            self._latest[record.is_active] = None
+        self.memory_bytes -= record.size()
+
+    async def refresh(self, db_session: DatabaseSession) -> None:
+        """Apply rows changed since the last refresh."""
+        async with self._lock:
+            started = time.perf_counter()
+            probe = select(func.max(Staff.updated_at), func.count(Staff.id))
+            watermark, row_count = (await db_session.execute(probe)).one()
+
+            unchanged = watermark == self._watermark and row_count == len(self._records)
+            if self._refreshed_at is None or row_count < len(self._records):
+                # First load, or rows were hard-deleted: start over
+                await self._load(db_session, since=None)
+            elif not unchanged:
+                await self._load(db_session, since=self._watermark)
+                if row_count != len(self._records):
+                    # Rows appeared with an updated_at older than the watermark
+                    await self._load(db_session, since=None)
+
+            self._refreshed_at = time.monotonic()
+            self.last_refresh_seconds = time.perf_counter() - started
+
+    async def _load(self, db_session: DatabaseSession, since: datetime | None) -> None:
+        statement = select(*STAFF_COLUMNS)
+        if since is not None:
+            # >= so rows sharing the watermark timestamp aren't missed; _put skips unchanged ones
+            statement = statement.where(Staff.updated_at >= since)
+        rows = (await db_session.execute(statement)).all()
+
+        if since is None:
+            await asyncio.to_thread(self._rebuild, rows)
+            logger.info(f"Staff snapshot loaded: {len(rows)} rows, ~{self.memory_bytes // 1024} KiB")
+            return
+
+        for row in rows:
+            self._put(StaffRecord(row))
+            # Only polls move the watermark: a local write mustn't hide an older commit from another process
+            if self._watermark is None or row.updated_at > self._watermark:
+                self._watermark = row.updated_at
+
+    def _rebuild(self, rows) -> None:
+        """Full load, in a worker thread; reads see the old snapshot until the new one is swapped in."""
+        records = {row.id: StaffRecord(row) for row in rows}
+        order: dict[bool, list[tuple[str, str]]] = {True: [], False: []}
+        for record in records.values():
+            order[record.is_active].append(record.key)
+        for keys in order.values():
+            keys.sort()
+        self._records, self._order = records, order
+        self._latest = {True: None, False: None}
+        self._watermark = max((row.updated_at for row in rows), default=None)
+        self.memory_bytes = sum(record.size() for record in records.values())
+
+    async def run(self) -> None:
+        """Background refresh loop (started from the app lifespan)."""
+        while True:
+            try:
+                async with open_session(read_only=True) as db_session:
+                    await self.refresh(db_session)
+            except Exception as e:
+                self.refresh_errors += 1
+                logger.error(f"Staff snapshot refresh failed: {e}")
+            await asyncio.sleep(self.refresh_seconds)
+
+    def stats(self) -> dict:
+        age = time.monotonic() - self._refreshed_at if self._refreshed_at is not None else -1
+        return {
+            "rows": len(self._records),
+            "memory_bytes": self.memory_bytes,
+            "age_seconds": round(age, 3),
+            "last_refresh_seconds": round(self.last_refresh_seconds, 4),
+            "refresh_errors": self.refresh_errors,
+            "serving": int(self.serving)
+        }
+
+
+staff_snapshot = StaffSnapshot()
+staff_events.add_listener(staff_snapshot.apply)
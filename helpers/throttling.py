@@ -0,0 +1,177 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable
+from fastapi import HTTPException, status
+from fastapi.responses import JSONResponse
+from helpers.metrics import Counter
+from settings import (
+    ADMISSION_MAX_CONCURRENCY, ADMISSION_MAX_QUEUE, ADMISSION_QUEUE_TIMEOUT_SECONDS,
+    RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST, RATE_LIMIT_MAX_KEYS
+)
+
+requests_shed = Counter("staff_http_requests_shed_total", "Requests rejected before running", labels=("reason",))
+
+
+class RateLimiter:
+    """
+    Token bucket per key: `burst` requests at once, refilled at `rate` per second.
+
+    Buckets are kept least-recently-used first and the oldest is dropped past
+    `max_keys`; an idle bucket would be full anyway, so dropping it is free.
+    They live in the worker's memory, so each worker limits on its own.
+
+    Args:
+        rate: Sustained requests per second per key (0 disables the limiter)
+        burst: Bucket size
+        max_keys: Maximum number of buckets kept in memory
+        clock: Monotonic clock, injectable for tests
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_keys: int = RATE_LIMIT_MAX_KEYS,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (tokens left, last refill time)
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.rejected = 0
+
+    def acquire(self, key: Hashable) -> float:
+        """Take a token for key. Returns 0 if allowed, else the seconds until a token is available."""
+        if self.rate <= 0:
+            return 0.0
+
+        now = self._clock()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+                self.rejected += 1
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+            return wait
+
+    def check(self, key: Hashable) -> None:
+        """Raise 429 with Retry-After when key is over its rate."""
+        wait = self.acquire(key)
+        if wait:
+            requests_shed.inc("rate_limited")
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))}
+            )
+
+    def stats(self) -> dict:
+        return {"keys": len(self._buckets), "rejected": self.rejected}
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware capping how many requests run at once.
+
+    The cap defaults to the primary pool's capacity (pool_size + max_overflow),
+    so requests queue here, in order, instead of on connection checkout. A
+    request that can't get a slot within `queue_timeout`, or arrives while
+    `max_queue` others are already waiting, is shed with 503 and Retry-After.
+    Server-Sent Events give their slot back once the stream starts; their
+    periodic polls are short. Paths in `exempt_paths` (health, metrics) are
+    never queued.
+    """
+
+    def __init__(
+        self,
+        app,
+        max_concurrency: int = ADMISSION_MAX_CONCURRENCY,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT_SECONDS,
+        exempt_paths: tuple[str, ...] = ()
+    ):
+        self.app = app
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.exempt_paths = frozenset(exempt_paths)
+        self.in_flight = 0
+        self.waiting = 0
+        self.shed = 0
+        self._slots = asyncio.Semaphore(max_concurrency)
+        admission_controllers.append(self)
+
+    def stats(self) -> dict:
+        return {"limit": self.max_concurrency, "in_flight": self.in_flight, "waiting": self.waiting, "shed": self.shed}
+
+    async def _acquire(self) -> bool:
+        if not self._slots.locked():
+            await self._slots.acquire()
+            return True
+        if self.waiting >= self.max_queue:
+            return False
+
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.max_concurrency <= 0 or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self._acquire():
+            self.shed += 1
+            requests_shed.inc("overloaded")
+            response = JSONResponse(
+                {"detail": "Server is busy, retry later"},
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={"Retry-After": str(max(1, math.ceil(self.queue_timeout)))}
+            )
+            await response(scope, receive, send)
+            return
+
+        self.in_flight += 1
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.in_flight -= 1
+                self._slots.release()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                content_type = dict(message["headers"]).get(b"content-type", b"")
+                if content_type.startswith(b"text/event-stream"):
+                    release()
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            release()
+
+
+# AdmissionMiddleware instances, for the metrics gauge (Starlette builds the middleware stack lazily)
+admission_controllers: list[AdmissionMiddleware] = []
+
+rate_limiter = RateLimiter(RATE_LIMIT_PER_SECOND, RATE_LIMIT_BURST)
@@ -0,0 +1,105 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack, ExitStack
+from typing import Awaitable, Callable
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+from database import (
+    DatabaseSession, async_engine, async_read_engine, engine, engine_creation_seconds, open_session, read_engine
+)
+from settings import DB_WARMUP_CONNECTIONS, STARTUP_WARMUP_ENABLED, logger
+
+# Wait before retrying a warm-up that failed (e.g. the database isn't reachable yet)
+RETRY_SECONDS = 2.0
+
+
+class Startup:
+    """
+    Startup report and readiness of this worker.
+
+    `warm_up()` opens `connections` connections on each engine the handlers
+    use and runs the hot statements on every one of them: the pools start
+    full, SQLAlchemy's compiled-statement cache is populated and, with
+    asyncpg, each connection has the statements prepared. It then builds the
+    in-memory indexes. The worker reports ready once that has succeeded; a
+    failed warm-up is retried.
+    """
+
+    def __init__(self, connections: int = DB_WARMUP_CONNECTIONS, enabled: bool = STARTUP_WARMUP_ENABLED):
+        self.connections = max(1, connections)
+        self.enabled = enabled
+        # Seconds per phase; imports is recorded by main.py once the app is imported
+        self.phases: dict[str, float] = {"imports": 0.0, "engines": engine_creation_seconds}
+        self.ready = False
+        self.attempts = 0
+
+    def record(self, phase: str, seconds: float) -> None:
+        self.phases[phase] = seconds
+
+    async def warm_up(self, statements: list, build_indexes: Callable[[DatabaseSession], Awaitable[None]]) -> None:
+        """Run once from the app lifespan; sets `ready` when done."""
+        if not self.enabled:
+            self.ready = True
+            return
+
+        while True:
+            self.attempts += 1
+            try:
+                started = time.perf_counter()
+                for target in _handler_engines():
+                    if isinstance(target, AsyncEngine):
+                        await self._warm_async(target, statements)
+                    else:
+                        await asyncio.to_thread(self._warm_sync, target, statements)
+                self.record("connections", time.perf_counter() - started)
+
+                started = time.perf_counter()
+                async with open_session(read_only=True) as db_session:
+                    await build_indexes(db_session)
+                self.record("indexes", time.perf_counter() - started)
+                break
+            except Exception:
+                # A shutdown can surface as a driver error from the session's rollback; don't retry through it
+                if asyncio.current_task().cancelling():
+                    raise asyncio.CancelledError from None
+                logger.exception(f"Startup warm-up failed, retrying in {RETRY_SECONDS:g}s")
+                await asyncio.sleep(RETRY_SECONDS)
+
+        self.ready = True
+        phases = ", ".join(f"{phase} {seconds:.3f}s" for phase, seconds in self.phases.items())
+        logger.info(f"Ready: {phases} ({self.connections} connections per engine, {len(statements)} statements)")
+
+    def _warm_sync(self, target: Engine, statements: list) -> None:
+        # Every session keeps its connection until the stack closes, so each one is a new connection
+        with ExitStack() as stack:
+            for _ in range(self.connections):
+                session = stack.enter_context(Session(target))
+                for statement in statements:
+                    session.execute(statement).first()
+
+    async def _warm_async(self, target: AsyncEngine, statements: list) -> None:
+        async with AsyncExitStack() as stack:
+            for _ in range(self.connections):
+                session = await stack.enter_async_context(AsyncSession(target))
+                for statement in statements:
+                    (await session.execute(statement)).first()
+
+    def report(self) -> dict:
+        return {"ready": self.ready, "phases": {phase: round(seconds, 4) for phase, seconds in self.phases.items()}}
+
+    def stats(self) -> dict:
+        return {"ready": int(self.ready), "attempts": self.attempts, **{
+            f"{phase}_seconds": round(seconds, 4) for phase, seconds in self.phases.items()
+        }}
+
+
+def _handler_engines() -> list:
+    """Engines request handlers use: the async ones with DB_ASYNC, the replica's too when configured."""
+    if async_engine is not None:
+        return list(dict.fromkeys((async_engine, async_read_engine)))
+    return list(dict.fromkeys((engine, read_engine)))
+
+
+startup = Startup()
@@ -1,16 +1,63 @@
+import time
+
+# Measured for the startup report: importing the app, its dependencies and creating the engines
+_imports_started = time.perf_counter()
+
+import asyncio
 import os
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from database import engine
 from api import staff_timetable
+from helpers.auth import auth_cache, token_statement
+from helpers.compression import CompressionMiddleware
+from helpers.invalidation import invalidation_bus
+from helpers.metrics import GaugeCallback, MetricsMiddleware, render_metrics
+from helpers.revocations import revocation_list
+from helpers.single_flight import staff_reads
+from helpers.staff_snapshot import staff_snapshot
+from helpers.throttling import AdmissionMiddleware, admission_controllers, rate_limiter
+from helpers.warmup import startup
+from settings import AUTH_JWT_VERIFY, COMPRESSION_ENABLED, STAFF_SNAPSHOT_ENABLED
+
+startup.record("imports", time.perf_counter() - _imports_started)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm up (ready once done), and keep the revocation list, the staff
+    snapshot and cross-worker invalidation running while enabled.
+    """
+    hot_statements = [token_statement("", datetime.now(timezone.utc)), *staff_timetable.warmup_statements()]
+    tasks = [asyncio.create_task(startup.warm_up(hot_statements, staff_timetable.warm_indexes))]
+    if invalidation_bus is not None:
+        tasks.append(asyncio.create_task(invalidation_bus.run()))
+    if AUTH_JWT_VERIFY:
+        tasks.append(asyncio.create_task(revocation_list.run()))
+    if STAFF_SNAPSHOT_ENABLED:
+        tasks.append(asyncio.create_task(staff_snapshot.run()))
+    yield
+    for task in tasks:
+        task.cancel()
+
 
 app = FastAPI(
     title="Agent Hub Staff Timetable API",
     version="1.0.0",
     docs_url="/staff-timetable/api/docs",
-    redoc_url="/staff-timetable/api/redoc"
+    redoc_url="/staff-timetable/api/redoc",
+    lifespan=lifespan
 )
 
+# Innermost middleware: holds a slot only while the route runs, and its 503s still get CORS headers
+app.add_middleware(AdmissionMiddleware, exempt_paths=(
+    "/staff-timetable/api/health", "/staff-timetable/api/ready", "/staff-timetable/api/metrics"
+))
+
 # CORS middleware for development
 if os.getenv("ENVIRONMENT", "development") == "development":
     app.add_middleware(
@@ -19,20 +66,82 @@ if os.getenv("ENVIRONMENT", "development") == "development":
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Browsers need this to read the ETag sent back in If-Match / If-None-Match
+        expose_headers=["ETag"],
     )
 else:
     app.add_middleware(
         CORSMiddleware,
         allow_origins=["http://localhost:3000", "http://localhost:5174"],
         allow_credentials=True,
-        allow_methods=["GET", "POST", "PUT", "DELETE"],
+        allow_methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
         allow_headers=["*"],
+        expose_headers=["ETag"],
     )
 
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+
+# Outermost middleware, so latency covers CORS handling too
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(staff_timetable.router, prefix="/staff-timetable/api")
 
+GaugeCallback(
+    "staff_auth_cache", "Auth token cache counters and size",
+    lambda: [((stat,), value) for stat, value in auth_cache.stats().items()],
+    labels=("stat",)
+)
+GaugeCallback(
+    "staff_admission", "Concurrent requests admitted, queued and shed",
+    lambda: [((stat,), value) for controller in admission_controllers for stat, value in controller.stats().items()],
+    labels=("stat",)
+)
+GaugeCallback(
+    "staff_rate_limit", "Per user/agent rate limiter counters and size",
+    lambda: [((stat,), value) for stat, value in rate_limiter.stats().items()],
+    labels=("stat",)
+)
+GaugeCallback(
+    "staff_single_flight", "Coalesced staff reads: queries run, requests that joined one, queries running",
+    lambda: [((stat,), value) for stat, value in staff_reads.stats().items()],
+    labels=("stat",)
+)
+GaugeCallback(
+    "staff_snapshot", "In-memory staff snapshot: rows, approximate memory, seconds since and spent on the last refresh",
+    lambda: [((stat,), value) for stat, value in staff_snapshot.stats().items()],
+    labels=("stat",)
+)
+GaugeCallback(
+    "staff_invalidation", "Staff changes sent to and received from other workers, and bus errors",
+    lambda: [((stat,), value) for stat, value in invalidation_bus.stats().items()] if invalidation_bus else [],
+    labels=("stat",)
+)
+GaugeCallback(
+    "staff_startup", "Readiness, warm-up attempts and seconds spent per startup phase",
+    lambda: [((stat,), value) for stat, value in startup.stats().items()],
+    labels=("stat",)
+)
+GaugeCallback(
+    "staff_auth_revocations", "Revocation list used by local JWT verification",
+    lambda: [((stat,), value) for stat, value in revocation_list.stats().items()],
+    labels=("stat",)
+)
+
 
 @app.get("/staff-timetable/api/health")
 async def root():
     """API health check."""
     return {"message": "Agent Hub Staff Timetable API is running"}
+
+
+@app.get("/staff-timetable/api/ready")
+async def ready():
+    """Readiness check: 503 until this worker has finished its startup warm-up."""
+    return JSONResponse(startup.report(), status_code=200 if startup.ready else 503)
+
+
+@app.get("/staff-timetable/api/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus metrics: route latency, SQL per request, pool and cache stats."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -6,30 +6,65 @@ Usage:
     python manage.py init_db
     python manage.py update_db
     python manage.py check_db
+    python manage.py backfill_shifts
+    python manage.py import_staff <file.csv|file.ndjson>
+    python manage.py export_staff <file.csv|file.ndjson>
+    python manage.py coverage_report [slot_minutes] [required_staff]
 """
 
+import os
 import sys
-from sqlmodel import text
-from database import engine, get_session
-from settings import logger
-from models.staff_models import Staff
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from sqlmodel import Session, select, text
+from database import engine
+from settings import logger, STAFF_IMPORT_BATCH_SIZE, STAFF_STREAM_BATCH_SIZE
+from models.staff_models import Staff, StaffShift
+from helpers.coverage import compile_minute_counts, coverage_report as build_coverage_report
+from helpers.schedule import parse_schedule
+from helpers.staff_io import FORMATS, export_header, export_rows, import_staff_records
+from helpers.staff_shifts import backfill_staff_shifts
+
+# Tables owned by this service, in creation order (auth tables belong to the main system)
+STAFF_TABLES = [Staff.__table__, StaffShift.__table__]
+
+ALEMBIC_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini")
+# Must match VERSION_TABLE in migrations/env.py
+ALEMBIC_VERSION_TABLE = "staff_alembic_version"
+
+
+def current_revision() -> str | None:
+    with engine.connect() as connection:
+        context = MigrationContext.configure(connection, opts={"version_table": ALEMBIC_VERSION_TABLE})
+        return context.get_current_revision()
+
+
+def migrate(revision: str = "head"):
+    """Apply Alembic migrations for the Staff tables (auth tables are never touched)."""
+    before = current_revision()
+    command.upgrade(Config(ALEMBIC_CONFIG), revision)
+    after = current_revision()
+    if before == after:
+        logger.info(f"✓ Migrations up to date (revision {after})")
+    else:
+        logger.info(f"✓ Migrated {before or 'empty'} -> {after}")
 
 
 def init_db():
-    """Initialize Staff table only (auth tables already exist)."""
-    logger.info("Creating Staff table if it doesn't exist...")
+    """Initialize Staff tables only (auth tables already exist)."""
+    logger.info("Creating Staff tables if they don't exist...")
 
-    # Only create Staff table
-    Staff.__table__.create(engine, checkfirst=True)
-    logger.info(f"✓ Created/verified table: {Staff.__tablename__}")
+    # The baseline migration creates the Staff tables; later ones add indexes
+    migrate()
 
-    logger.info("Staff table created successfully")
+    logger.info("Staff tables created successfully")
 
 
 def check_db():
     """Check database connection and tables."""
     try:
-        with next(get_session()) as session:
+        with Session(engine) as session:
             # Check for PostgreSQL
             result = session.exec(text("SELECT tablename FROM pg_tables WHERE schemaname = 'public'"))
             tables = result.fetchall()
@@ -37,7 +72,7 @@ def check_db():
     except Exception as e:
         # Try SQLite format
         try:
-            with next(get_session()) as session:
+            with Session(engine) as session:
                 result = session.exec(text("SELECT name FROM sqlite_master WHERE type='table'"))
                 tables = result.fetchall()
                 logger.info(f"Database connected. Found {len(tables)} tables: {[t[0] for t in tables]}")
@@ -47,9 +82,9 @@ def check_db():
 
 
 def update_db():
-    """Intelligently update database - only create Staff table if missing."""
+    """Create missing Staff tables and apply pending migrations (e.g. new indexes)."""
     try:
-        with next(get_session()) as session:
+        with Session(engine) as session:
             # Get existing tables
             try:
                 # Try PostgreSQL
@@ -62,27 +97,116 @@ def update_db():
 
             logger.info(f"Existing tables: {sorted(existing_tables)}")
 
-            # Check if Staff table exists
-            if 'staff' not in existing_tables:
-                logger.info("Creating missing Staff table...")
-                Staff.__table__.create(engine, checkfirst=True)
-                logger.info(f"✓ Created table: staff")
-                logger.info("Database update completed successfully")
-            else:
-                logger.info("✓ Database is up to date - Staff table exists")
+        # Check which Staff tables are missing; migrations create them and add any new indexes
+        missing_tables = [table for table in STAFF_TABLES if table.name not in existing_tables]
+        for table in missing_tables:
+            logger.info(f"Creating missing table: {table.name}...")
+
+        migrate()
+
+        if StaffShift.__table__ in missing_tables:
+            logger.info("Run 'python manage.py backfill_shifts' to populate staff_shift")
+        logger.info("Database update completed successfully")
 
     except Exception as e:
         logger.error(f"Failed to update database: {e}")
         sys.exit(1)
 
 
+def backfill_shifts():
+    """Rebuild the staff_shift table from every Staff.schedule."""
+    try:
+        with Session(engine) as session:
+            processed = backfill_staff_shifts(session)
+        logger.info(f"✓ Backfilled shifts for {processed} staff members")
+    except Exception as e:
+        logger.error(f"Failed to backfill shifts: {e}")
+        sys.exit(1)
+
+
+def _format_from_path(path: str) -> str:
+    """Pick csv/ndjson from the file extension."""
+    extension = os.path.splitext(path)[1].lstrip(".").lower()
+    if extension == "jsonl":
+        extension = "ndjson"
+    if extension not in FORMATS:
+        logger.error(f"Cannot infer format from {path!r}; use a .csv or .ndjson file")
+        sys.exit(1)
+    return extension
+
+
+def import_staff(path: str):
+    """Bulk-create staff from a CSV or NDJSON file."""
+    fmt = _format_from_path(path)
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as source, Session(engine) as session:
+            result = import_staff_records(session, source, fmt, STAFF_IMPORT_BATCH_SIZE)
+    except Exception as e:
+        logger.error(f"Failed to import staff: {e}")
+        sys.exit(1)
+
+    for error in result["errors"]:
+        logger.warning(f"Line {error['line']}: {error['error']}")
+    logger.info(f"✓ Imported {result['created']} staff members ({len(result['errors'])} rejected)")
+    if result["errors"]:
+        sys.exit(1)
+
+
+def export_staff(path: str):
+    """Export every staff member to a CSV or NDJSON file."""
+    fmt = _format_from_path(path)
+    exported = 0
+    statement = (
+        select(Staff)
+        .order_by(Staff.name, Staff.id)
+        .execution_options(yield_per=STAFF_STREAM_BATCH_SIZE)
+    )
+    try:
+        with open(path, "w", newline="", encoding="utf-8") as target, Session(engine) as session:
+            target.write(export_header(fmt))
+            for partition in session.exec(statement).partitions():
+                target.write(export_rows(partition, fmt))
+                exported += len(partition)
+    except Exception as e:
+        logger.error(f"Failed to export staff: {e}")
+        sys.exit(1)
+
+    logger.info(f"✓ Exported {exported} staff members to {path}")
+
+
+def coverage_report(slot_minutes: int = 60, required_staff: int = 1):
+    """Print weekly headcount per slot and under-staffed gaps for active staff."""
+    try:
+        with Session(engine) as session:
+            schedules = session.exec(select(Staff.schedule).where(Staff.is_active == True))
+            minute_counts = compile_minute_counts(parse_schedule(schedule) for schedule in schedules)
+        report = build_coverage_report(minute_counts, slot_minutes, required_staff)
+    except Exception as e:
+        logger.error(f"Failed to build coverage report: {e}")
+        sys.exit(1)
+
+    print(f"Headcount per {slot_minutes}-minute slot (required: {required_staff})")
+    for day in report["days"]:
+        print(f"  {day['weekday']:<10} min={day['min_headcount']:<3} max={day['max_headcount']:<3} "
+              f"{' '.join(str(count) for count in day['headcount'])}")
+
+    print(f"Gaps: {len(report['gaps'])}")
+    for gap in report["gaps"]:
+        print(f"  {gap['start_weekday']} {gap['start']} -> {gap['end_weekday']} {gap['end']} "
+              f"(headcount {gap['headcount']})")
+
+
 def main():
     if len(sys.argv) < 2:
         print("Usage: python manage.py <command>")
         print("Commands:")
-        print("  init_db    - Initialize Staff table")
-        print("  update_db  - Create Staff table if missing")
-        print("  check_db   - Check database connection")
+        print("  init_db         - Initialize Staff tables")
+        print("  update_db       - Create Staff tables if missing")
+        print("  check_db        - Check database connection")
+        print("  backfill_shifts - Rebuild staff_shift from Staff.schedule")
+        print("  import_staff    - Bulk-create staff from a .csv/.ndjson file")
+        print("  export_staff    - Export staff to a .csv/.ndjson file")
+        print("  coverage_report - Print weekly headcount and under-staffed gaps")
         sys.exit(1)
 
     command = sys.argv[1]
@@ -93,6 +217,18 @@ def main():
         update_db()
     elif command == "check_db":
         check_db()
+    elif command == "backfill_shifts":
+        backfill_shifts()
+    elif command in ("import_staff", "export_staff"):
+        if len(sys.argv) < 3:
+            print(f"Usage: python manage.py {command} <file.csv|file.ndjson>")
+            sys.exit(1)
+        if command == "import_staff":
+            import_staff(sys.argv[2])
+        else:
+            export_staff(sys.argv[2])
+    elif command == "coverage_report":
+        coverage_report(*(int(arg) for arg in sys.argv[2:4]))
     else:
         print(f"Unknown command: {command}")
         print("Run 'python manage.py' to see available commands")
@@ -0,0 +1,56 @@
+from alembic import context
+from sqlmodel import SQLModel
+import models  # noqa: F401 - registers every table on SQLModel.metadata
+from database import engine
+
+# Only the tables this service owns. Auth tables (user, agent, token, ...) share the
+# database but belong to the main system, so autogenerate must never touch them.
+STAFF_TABLE_NAMES = {"staff", "staff_shift"}
+
+# The main system may keep its own alembic_version table in the same database
+VERSION_TABLE = "staff_alembic_version"
+
+
+def include_object(obj, name, type_, reflected, compare_to) -> bool:
+    if type_ == "table":
+        return name in STAFF_TABLE_NAMES
+    table = getattr(obj, "table", None)
+    if table is not None and table.name not in STAFF_TABLE_NAMES:
+        return False
+    # pg_trgm expression indexes live only in migrations, not on the models
+    if type_ == "index" and name and name.endswith("_trgm"):
+        return False
+    return True
+
+
+def run_migrations_offline() -> None:
+    """Emit SQL to stdout (`alembic upgrade head --sql`)."""
+    context.configure(
+        url=engine.url.render_as_string(hide_password=False),
+        target_metadata=SQLModel.metadata,
+        literal_binds=True,
+        version_table=VERSION_TABLE,
+        include_object=include_object,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online() -> None:
+    with engine.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=SQLModel.metadata,
+            version_table=VERSION_TABLE,
+            include_object=include_object,
+            # SQLite can't ALTER most things in place; batch mode rebuilds the table
+            render_as_batch=connection.dialect.name == "sqlite",
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
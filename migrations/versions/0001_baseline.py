@@ -0,0 +1,58 @@
+"""Baseline: staff and staff_shift as created by manage.py before migrations
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Databases set up before migrations already have these tables; only fill in what's missing.
+    # Offline (--sql) there is nothing to inspect, so emit the full DDL.
+    if op.get_context().as_sql:
+        existing = set()
+    else:
+        existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if "staff" not in existing:
+        op.create_table(
+            "staff",
+            sa.Column("id", sqlmodel.AutoString(), nullable=False),
+            sa.Column("name", sqlmodel.AutoString(), nullable=False),
+            sa.Column("email", sqlmodel.AutoString(), nullable=True),
+            sa.Column("schedule", sqlmodel.AutoString(), nullable=False),
+            sa.Column("is_active", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(), nullable=False),
+            sa.Column("updated_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_staff_name", "staff", ["name"])
+        op.create_index("ix_staff_email", "staff", ["email"])
+
+    if "staff_shift" not in existing:
+        op.create_table(
+            "staff_shift",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("staff_id", sqlmodel.AutoString(), nullable=False),
+            sa.Column("weekday", sa.Integer(), nullable=False),
+            sa.Column("start_minute", sa.Integer(), nullable=False),
+            sa.Column("end_minute", sa.Integer(), nullable=False),
+            sa.ForeignKeyConstraint(["staff_id"], ["staff.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_staff_shift_weekday_start_end", "staff_shift", ["weekday", "start_minute", "end_minute"])
+        op.create_index("ix_staff_shift_staff_weekday", "staff_shift", ["staff_id", "weekday"])
+
+
+def downgrade() -> None:
+    # The staff table is shared with the POS system; never drop it from here
+    pass
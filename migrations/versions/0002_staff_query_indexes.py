@@ -0,0 +1,58 @@
+"""Indexes for the filtered staff list, the change feed and typeahead search
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _is_postgres() -> bool:
+    return op.get_context().dialect.name == "postgresql"
+
+
+def _create_index(name: str, columns: list, **kwargs) -> None:
+    """On Postgres build without locking writes: CONCURRENTLY, outside the migration transaction."""
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.create_index(name, "staff", columns, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+    else:
+        op.create_index(name, "staff", columns, if_not_exists=True, **kwargs)
+
+
+def _drop_index(name: str) -> None:
+    if _is_postgres():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, "staff", postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(name, "staff", if_exists=True)
+
+
+def upgrade() -> None:
+    # GET /staff?is_active=... ordered by (name, id), keyset pagination included
+    _create_index("ix_staff_active_name_id", ["is_active", "name", "id"])
+    # GET /staff/changes, SSE catch-up and the max(updated_at) probes of the in-memory indexes
+    _create_index("ix_staff_updated_at_id", ["updated_at", "id"])
+
+    if _is_postgres():
+        # GET /staff/search with STAFF_SEARCH_BACKEND=sql
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        _create_index("ix_staff_name_trgm", [sa.text("lower(name) gin_trgm_ops")], postgresql_using="gin")
+        _create_index(
+            "ix_staff_email_trgm", [sa.text("lower(coalesce(email, '')) gin_trgm_ops")], postgresql_using="gin"
+        )
+
+
+def downgrade() -> None:
+    if _is_postgres():
+        _drop_index("ix_staff_email_trgm")
+        _drop_index("ix_staff_name_trgm")
+    _drop_index("ix_staff_updated_at_id")
+    _drop_index("ix_staff_active_name_id")
@@ -1,7 +1,7 @@
 from .auth import User, Agent, Token, TokenUser, TokenAgent, UserRole
-from .staff_models import Staff
+from .staff_models import Staff, StaffShift
 
 __all__ = [
     'User', 'Agent', 'Token', 'TokenUser', 'TokenAgent', 'UserRole',
-    'Staff'
+    'Staff', 'StaffShift'
 ]
@@ -1,4 +1,4 @@
-from sqlmodel import SQLModel, Field
+from sqlmodel import SQLModel, Field, Index
 from datetime import datetime, timezone
 from .helper import id_generator
 import json
@@ -6,6 +6,12 @@ import json
 
 class Staff(SQLModel, table=True):
     """Modelo para personal del punto de venta con horarios de trabajo."""
+    # Schema changes go through Alembic (migrations/); keep these in sync with the migrations
+    __table_args__ = (
+        Index("ix_staff_active_name_id", "is_active", "name", "id"),
+        Index("ix_staff_updated_at_id", "updated_at", "id"),
+    )
+
     id: str = Field(default_factory=id_generator('staff', 10), primary_key=True)
     name: str = Field(index=True)
     email: str | None = Field(default=None, index=True)
@@ -21,3 +27,18 @@ class Staff(SQLModel, table=True):
     def set_schedule(self, schedule: dict):
         """Set schedule from Python dict to JSON string."""
         self.schedule = json.dumps(schedule)
+
+
+class StaffShift(SQLModel, table=True):
+    """Turnos normalizados derivados de Staff.schedule, para filtrar por día y hora en SQL."""
+    __tablename__ = "staff_shift"
+    __table_args__ = (
+        Index("ix_staff_shift_weekday_start_end", "weekday", "start_minute", "end_minute"),
+        Index("ix_staff_shift_staff_weekday", "staff_id", "weekday"),
+    )
+
+    id: int | None = Field(default=None, primary_key=True)
+    staff_id: str = Field(foreign_key="staff.id", ondelete="CASCADE")
+    weekday: int  # 0 = Monday
+    start_minute: int  # Minutes since midnight
+    end_minute: int  # Exclusive
@@ -24,6 +24,10 @@ DB_BACKEND = os.getenv("DB_BACKEND", "sqlite").lower()
 if DB_BACKEND == "sqlite":
     SQLITE_PATH = os.getenv("SQLITE_PATH", "./agent_hub_staff_timetable.db")
     DATABASE_URL = f"sqlite:///{SQLITE_PATH}"
+    ASYNC_DATABASE_URL = f"sqlite+aiosqlite:///{SQLITE_PATH}"
+    # SQLite has no replicas
+    READ_DATABASE_URL = None
+    ASYNC_READ_DATABASE_URL = None
 elif DB_BACKEND == "postgres":
     # Required PostgreSQL environment variables
     POSTGRES_HOST = os.getenv("POSTGRES_HOST")
@@ -39,5 +43,135 @@ elif DB_BACKEND == "postgres":
         )
 
     DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+    ASYNC_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+
+    # Optional read replica (same database and credentials) used by GET routes
+    POSTGRES_READ_HOST = os.getenv("POSTGRES_READ_HOST")
+    POSTGRES_READ_PORT = os.getenv("POSTGRES_READ_PORT", POSTGRES_PORT)
+    if POSTGRES_READ_HOST:
+        READ_DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_READ_HOST}:{POSTGRES_READ_PORT}/{POSTGRES_DB}"
+        ASYNC_READ_DATABASE_URL = f"postgresql+asyncpg://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_READ_HOST}:{POSTGRES_READ_PORT}/{POSTGRES_DB}"
+    else:
+        READ_DATABASE_URL = None
+        ASYNC_READ_DATABASE_URL = None
 else:
     raise ValueError(f"Unsupported DB_BACKEND: {DB_BACKEND}. Use 'sqlite' or 'postgres'")
+
+# Use async SQLAlchemy (aiosqlite/asyncpg) for request handling so queries don't block the event loop
+DB_ASYNC = os.getenv("DB_ASYNC", "false").lower() == "true"
+
+# Connection pool per engine (Postgres, and SQLite in the production profile)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+
+# After a client's own write, its reads go to the primary for this long (replica lag bound)
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+
+# SQLite tuning: "basic" keeps driver defaults; "production" enables WAL, synchronous=NORMAL,
+# memory-mapped reads and a busy timeout so concurrent readers don't block on the writer
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "basic").lower()
+SQLITE_MMAP_BYTES = int(os.getenv("SQLITE_MMAP_BYTES", str(256 * 1024 * 1024)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+
+# Auth token cache configuration
+# TTL is the staleness bound for revocations/deactivations made outside this process.
+AUTH_CACHE_ENABLED = os.getenv("AUTH_CACHE_ENABLED", "true").lower() == "true"
+AUTH_CACHE_MAX_SIZE = int(os.getenv("AUTH_CACHE_MAX_SIZE", "10000"))
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "30"))
+
+# Local JWT verification: check the signature and expiry with the main system's signing key, and
+# revocation and user/agent status against the revocation list, with no query per request.
+# Revocations/deactivations lag by up to the refresh interval; a token row deleted without being
+# revoked isn't noticed, so its JWT stays valid until it expires.
+AUTH_JWT_VERIFY = os.getenv("AUTH_JWT_VERIFY", "false").lower() == "true"
+AUTH_JWT_SECRET = os.getenv("AUTH_JWT_SECRET", "")
+AUTH_JWT_ALGORITHMS = [name.strip() for name in os.getenv("AUTH_JWT_ALGORITHMS", "HS256").split(",")]
+AUTH_REVOCATION_REFRESH_SECONDS = float(os.getenv("AUTH_REVOCATION_REFRESH_SECONDS", "10"))
+
+if AUTH_JWT_VERIFY and not AUTH_JWT_SECRET:
+    raise ValueError("AUTH_JWT_VERIFY requires AUTH_JWT_SECRET")
+
+# Staff listing
+STAFF_PAGE_MAX_LIMIT = int(os.getenv("STAFF_PAGE_MAX_LIMIT", "500"))
+STAFF_STREAM_BATCH_SIZE = int(os.getenv("STAFF_STREAM_BATCH_SIZE", "500"))
+# Most ids resolved by one /staff/batch request
+STAFF_BATCH_MAX_IDS = int(os.getenv("STAFF_BATCH_MAX_IDS", "500"))
+# Identical concurrent reads (same staff id, same list filter) share one query. Only useful with
+# DB_ASYNC: synchronous queries block the event loop, so reads never overlap.
+SINGLE_FLIGHT_ENABLED = os.getenv("SINGLE_FLIGHT_ENABLED", str(DB_ASYNC)).lower() == "true"
+# Serve GET /staff, /staff/{id} and /staff/batch from an in-memory copy of the table, polled for
+# changes every STAFF_SNAPSHOT_REFRESH_SECONDS. Names are ordered by code point, as in SQLite and
+# Postgres' C collation; leave off if the database sorts names with another collation.
+STAFF_SNAPSHOT_ENABLED = os.getenv("STAFF_SNAPSHOT_ENABLED", "false").lower() == "true"
+STAFF_SNAPSHOT_REFRESH_SECONDS = float(os.getenv("STAFF_SNAPSHOT_REFRESH_SECONDS", "2"))
+
+# Typeahead search (/staff/search): "index" (in-memory) or "sql" (pg_trgm indexes, Postgres only)
+STAFF_SEARCH_BACKEND = os.getenv("STAFF_SEARCH_BACKEND", "sql" if DB_BACKEND == "postgres" else "index").lower()
+STAFF_SEARCH_MAX_LIMIT = int(os.getenv("STAFF_SEARCH_MAX_LIMIT", "50"))
+# Max seconds the in-memory search index can lag behind writes made by other processes
+STAFF_SEARCH_REFRESH_SECONDS = float(os.getenv("STAFF_SEARCH_REFRESH_SECONDS", "5"))
+
+# Bulk import: rows per INSERT/commit, and request bytes kept in memory before spilling to disk
+STAFF_IMPORT_BATCH_SIZE = int(os.getenv("STAFF_IMPORT_BATCH_SIZE", "500"))
+STAFF_IMPORT_SPOOL_BYTES = int(os.getenv("STAFF_IMPORT_SPOOL_BYTES", str(8 * 1024 * 1024)))
+
+# Schedules
+# Timezone of the wall-clock times stored in Staff.schedule
+SCHEDULE_TIMEZONE = os.getenv("SCHEDULE_TIMEZONE", "UTC")
+# Max seconds the on-shift index can lag behind writes made by other processes
+SHIFT_INDEX_REFRESH_SECONDS = float(os.getenv("SHIFT_INDEX_REFRESH_SECONDS", "5"))
+# How /staff/on-shift is answered: "index" (in-memory) or "sql" (staff_shift table)
+SHIFT_LOOKUP_BACKEND = os.getenv("SHIFT_LOOKUP_BACKEND", "index").lower()
+# Dated shifts (/staff/shifts): longest range per request, and the per-staff expansion cache
+SHIFT_RANGE_MAX_DAYS = int(os.getenv("SHIFT_RANGE_MAX_DAYS", "366"))
+SHIFT_CACHE_MAX_SIZE = int(os.getenv("SHIFT_CACHE_MAX_SIZE", "10000"))
+SHIFT_CACHE_TTL_SECONDS = float(os.getenv("SHIFT_CACHE_TTL_SECONDS", "3600"))
+
+# Change feed / Server-Sent Events
+# SSE streams re-check the database (and send a keep-alive) at this interval to catch writes from other processes
+STAFF_EVENTS_POLL_SECONDS = float(os.getenv("STAFF_EVENTS_POLL_SECONDS", "15"))
+STAFF_EVENTS_QUEUE_SIZE = int(os.getenv("STAFF_EVENTS_QUEUE_SIZE", "1000"))
+
+# Load shedding
+# Requests allowed to run at once (default: the primary pool's capacity, as a request holds at most one
+# primary connection; 0 disables), how many more may queue for a slot, and how long they may wait before
+# being shed with 503 + Retry-After
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", str(DB_POOL_SIZE + DB_MAX_OVERFLOW)))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "100"))
+ADMISSION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "5"))
+# Token bucket per user/agent: sustained requests per second (off by default, 0 disables) and burst size;
+# over it, 429 + Retry-After. Buckets are per worker, so a client may get up to WEB_CONCURRENCY times the rate
+RATE_LIMIT_PER_SECOND = float(os.getenv("RATE_LIMIT_PER_SECOND", "0"))
+RATE_LIMIT_BURST = int(os.getenv("RATE_LIMIT_BURST", "40"))
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+
+# Startup warm-up: before a worker reports ready (GET /ready) it opens this many connections per engine,
+# runs the hot statements (auth, list, get) on each to fill the statement caches, and builds the indexes
+STARTUP_WARMUP_ENABLED = os.getenv("STARTUP_WARMUP_ENABLED", "true").lower() == "true"
+DB_WARMUP_CONNECTIONS = int(os.getenv("DB_WARMUP_CONNECTIONS", str(DB_POOL_SIZE)))
+
+# Multi-worker serving: entrypoint.sh runs gunicorn with this many workers (preloaded app) when above 1
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Relays staff writes to the in-process caches of every other worker: "postgres" (LISTEN/NOTIFY, reaches
+# every container on the database), "unix" (datagram sockets between workers on one host) or "none"
+INVALIDATION_BACKEND = os.getenv(
+    "INVALIDATION_BACKEND", "postgres" if DB_BACKEND == "postgres" else "unix" if WEB_CONCURRENCY > 1 else "none"
+).lower()
+INVALIDATION_CHANNEL = os.getenv("INVALIDATION_CHANNEL", "staff_invalidation")
+INVALIDATION_SOCKET_DIR = os.getenv("INVALIDATION_SOCKET_DIR", "/tmp/staff-timetable-invalidation")
+
+if INVALIDATION_BACKEND not in ("postgres", "unix", "none"):
+    raise ValueError(f"Unsupported INVALIDATION_BACKEND: {INVALIDATION_BACKEND}. Use 'postgres', 'unix' or 'none'")
+if INVALIDATION_BACKEND == "postgres" and DB_BACKEND != "postgres":
+    raise ValueError("INVALIDATION_BACKEND=postgres requires DB_BACKEND=postgres")
+
+# Response compression (brotli or gzip, negotiated with Accept-Encoding)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+# Smaller single-piece bodies go out uncompressed; the encoding overhead isn't worth it
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "5"))
+
+# Metrics
+# Requests slower than this are logged with their SQL breakdown (0 disables)
+SLOW_REQUEST_SECONDS = float(os.getenv("SLOW_REQUEST_SECONDS", "1.0"))